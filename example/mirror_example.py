@@ -21,7 +21,8 @@ class Mirrorer(object):
 
         self._auth_key = auth_key
         self.pb = PushBullet(self._auth_key)
-        self.listener = Listener(self.pb, self.watcher)
+        # check_pushes makes requests, handle the events on a worker so the connection stays responsive
+        self.listener = Listener(self.pb, self.watcher, workers=1)
 
         self.last_push = last_push
 
@@ -53,17 +54,12 @@ class Mirrorer(object):
             return path
 
     def check_pushes(self):
-        pushes = self.pb.get_pushes(self.last_push)
+        pushes = self.pb.get_pushes(self.last_push, as_objects=True)
         for push in pushes:
-            if not isinstance(push, dict):
-                # not a push object
-                continue
-            if (push.get("target_device_iden", self.device.device_iden) == self.device.device_iden) and not (
-                push.get("dismissed", True)
-            ):
-                self.notify(push.get("title", ""), push.get("body", ""))
-                self.pb.dismiss_push(push.get("iden"))
-            self.last_push = max(self.last_push, push.get("created"))
+            if push.target_device_iden in (None, self.device.device_iden) and not push.get("dismissed", True):
+                self.notify(push.title or "", push.body or "")
+                self.pb.dismiss_push(push.iden)
+            self.last_push = max(self.last_push, push.created)
 
     def watcher(self, push):
         if push["type"] == "push" and push["push"]["type"] == "mirror":
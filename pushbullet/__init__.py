@@ -1,18 +1,30 @@
 from .__version__ import __version__
+from .cache import FileCache, MemoryCache
 from .device import Device
-from .errors import InvalidKeyError, PushbulletError, PushError
+from .errors import DecryptionError, InvalidKeyError, PushbulletError, PushError
 from .listener import Listener
+from .push import Push
 from .pushbullet import Pushbullet
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
+from .store import PushStore
 
 PushBullet = Pushbullet
 
 __all__ = [
     "__version__",
+    "DecryptionError",
     "Device",
+    "FileCache",
     "InvalidKeyError",
     "PushbulletError",
     "PushError",
     "Listener",
+    "MemoryCache",
+    "Push",
     "Pushbullet",
     "PushBullet",
+    "PushStore",
+    "RateLimiter",
+    "RetryPolicy",
 ]
@@ -6,8 +6,14 @@ def _py2_b64encode(x):
 
 
 if sys.version_info[0] == 2:
+    import Queue as queue
+
     standard_b64encode = _py2_b64encode
+    string_types = (str, unicode)  # noqa: F821
 else:
+    import queue
     from base64 import standard_b64encode
 
-__all__ = ["standard_b64encode"]
+    string_types = (str, bytes)
+
+__all__ = ["queue", "standard_b64encode", "string_types"]
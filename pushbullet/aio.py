@@ -0,0 +1,607 @@
+import asyncio
+import io
+import json
+import logging
+import time
+
+from ._compat import standard_b64encode
+from .chat import Chat
+from .device import Device
+from .errors import NoAsyncModuleError, PushbulletError, PushError
+from .filetype import sniff_file_type
+from .listener import WEBSOCKET_URL, catch_up_after, decode_message, sync_events
+from .pagination import PageIterator
+from .pushbullet import Pushbullet
+from .retry import exponential_backoff
+from .upload import MultipartFileStream
+
+try:
+    import aiohttp
+except ImportError as e:
+    aiohttp = None
+    _aiohttp_import_error = str(e)
+
+log = logging.getLogger("pushbullet.AsyncListener")
+
+# Queued for the consumer of an AsyncListener once no more events will follow
+_CLOSED = object()
+
+
+class _Response(object):
+    """The parts of an aiohttp response the client needs, read while the connection was open."""
+
+    def __init__(self, status_code, headers, text):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class _UploadBody(io.RawIOBase):
+    """
+    A :class:`MultipartFileStream` as an io object, the kind of file aiohttp streams. aiohttp reads it in an executor,
+    so the file isn't read on the event loop.
+    """
+
+    def __init__(self, stream):
+        super(_UploadBody, self).__init__()
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        data = self._stream.read(len(b))
+        b[: len(data)] = data
+        return len(data)
+
+    def read(self, size=-1):
+        return self._stream.read(size)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self._stream.seek(offset, whence)
+        return self._stream.tell()
+
+    def tell(self):
+        return self._stream.tell()
+
+
+class AsyncPageIterator(PageIterator):
+    """Asynchronous version of :class:`PageIterator`, to be consumed with ``async for``."""
+
+    # The pages are fetched by coroutines, iterating synchronously can't wait for them
+    def __iter__(self):
+        raise TypeError("AsyncPageIterator can't be iterated synchronously, use async for")
+
+    def __next__(self):
+        raise TypeError("AsyncPageIterator can't be iterated synchronously, use async for")
+
+    next = __next__
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.limit is not None and self.count >= self.limit:
+            raise StopAsyncIteration
+
+        while True:
+            try:
+                item = next(self._page)
+                break
+            except StopIteration:
+                if self._last_page:
+                    raise StopAsyncIteration
+                await self._fetch_page()
+
+        self.count += 1
+        self.offset += 1
+        return item
+
+    async def _fetch_page(self):
+        self._set_page(await self._account._get_data(self._url, self._page_params()))
+
+
+class AsyncPushbullet(Pushbullet):
+    """
+    asyncio version of :class:`Pushbullet`, built on aiohttp.
+
+    Every method doing a request is a coroutine, the push methods of :class:`Device`, :class:`Chat` and
+    :class:`Channel` objects belonging to this client return coroutines too. Nothing is loaded on creation, use the
+    client as an async context manager or await :meth:`refresh` before accessing ``devices``, ``chats``,
+    ``channels`` or ``user_info``::
+
+        async with AsyncPushbullet(api_key) as pb:
+            await pb.push_note("title", "body")
+    """
+
+    _page_iterator = AsyncPageIterator
+
+    def __init__(
+        self,
+        api_key,
+        encryption_password=None,
+        proxy=None,
+        lazy=False,
+        page_size=None,
+        session=None,
+        rate_limiter=None,
+        retry=None,
+        upload_cache=None,
+        encryption_key=None,
+        key_cache=None,
+    ):
+        """
+        :param api_key: Pushbullet access token
+        :param encryption_password: Password used for end-to-end encryption
+        :param proxy: Dictionary of HTTPS proxies, only the ``https`` entry is used
+        :param lazy: Don't load devices, chats, channels and user info when entering the context manager
+        :param page_size: Number of objects requested per page when loading devices, chats and channels
+        :param session: aiohttp.ClientSession to use instead of creating one. The API key is sent with every request
+            instead of being set on the session, so it can be shared between clients of different accounts
+        :param rate_limiter: RateLimiter pacing the requests of this client
+        :param retry: RetryPolicy applied to all requests, failed requests are not retried if not given
+        :param upload_cache: Cache remembering uploaded files by their contents
+        :param encryption_key: End-to-end encryption key derived earlier, used instead of ``encryption_password``
+        :param key_cache: Cache keeping the keys derived from ``encryption_password``
+        """
+        if aiohttp is None:
+            raise NoAsyncModuleError(_aiohttp_import_error)
+
+        self._owns_session = session is None
+        super(AsyncPushbullet, self).__init__(
+            api_key,
+            proxy=proxy,
+            lazy=True,
+            page_size=page_size,
+            session=session,
+            rate_limiter=rate_limiter,
+            retry=retry,
+            upload_cache=upload_cache,
+            encryption_key=encryption_key,
+            key_cache=key_cache,
+        )
+
+        self._lazy = lazy
+        self._encryption_password = encryption_password
+        self._headers = dict(self._json_header)
+        self._headers["Authorization"] = "Basic " + standard_b64encode((self.api_key + ":").encode("UTF-8")).decode(
+            "ASCII"
+        )
+        self._proxy = proxy.get("https") if proxy else None
+
+    def _configure_session(self, session, adapter, pool_connections, pool_maxsize, keep_alive, proxy):
+        # The aiohttp session can only be created inside a running event loop
+        return session
+
+    def _get_session(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    async def close(self):
+        """Close the aiohttp session if it was created by this client."""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        if not self._lazy:
+            await self.refresh()
+        await self._ensure_encryption_key()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _ensure_encryption_key(self):
+        if self._encryption_password and not self._encryption_key:
+            if self._user_info is None:
+                self.user_info = await self._fetch_user_info()
+            loop = asyncio.get_event_loop()
+            self._encryption_key = await loop.run_in_executor(None, self._derive_key, self._encryption_password)
+
+    async def _request(self, method, url, idempotent=None, paced=True, **kwargs):
+        if idempotent is None:
+            idempotent = method in ("get", "delete")
+        if kwargs.get("params"):
+            # aiohttp refuses None values instead of leaving them out
+            kwargs["params"] = {k: v for k, v in kwargs["params"].items() if v is not None}
+        kwargs.setdefault("headers", self._headers)
+
+        session = self._get_session()
+        attempt = 0
+        while True:
+            attempt += 1
+            if attempt > 1 and hasattr(kwargs.get("data"), "seek"):
+                kwargs["data"].seek(0)
+            if paced:
+                await asyncio.sleep(self.rate_limiter.delay())
+            try:
+                async with session.request(method, url, proxy=self._proxy, **kwargs) as resp:
+                    response = _Response(resp.status, resp.headers, await resp.text())
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if not self.retry.should_retry(attempt, idempotent=idempotent):
+                    raise
+                await asyncio.sleep(self.retry.delay(attempt))
+                continue
+
+            if paced:
+                self.rate_limiter.update(response.headers)
+            if response.status_code == 200:
+                return response
+            if not self.retry.should_retry(attempt, response.status_code, idempotent):
+                return response
+            await asyncio.sleep(self.retry.delay(attempt, response.headers))
+
+    async def _get_data(self, url, params=None):
+        resp = await self._request("get", url, params=params)
+        return self._check_data_response(resp)
+
+    def _load_collection(self, name, incremental=False):
+        raise PushbulletError("{} have not been loaded yet, await refresh() first".format(name))
+
+    def _load_user_info(self):
+        raise PushbulletError("user info has not been loaded yet, await refresh() first")
+
+    async def _sync_collection(self, name, modified_after=None):
+        items = [item async for item in self._fetch_collection(name, modified_after)]
+        return self._build_collection(name, items, incremental=modified_after is not None)
+
+    async def refresh(self, incremental=False):
+        """
+        Reload the devices, chats, user info and channels of the account, issuing the requests concurrently.
+
+        :param incremental: Only fetch the devices, chats and channels modified since the last refresh and merge
+            them into the current lists.
+        """
+        names = ("devices", "chats", "channels")
+        watermarks = [self._sync_watermark(name) if incremental else None for name in names]
+        results = await asyncio.gather(
+            *[self._sync_collection(name, watermark) for name, watermark in zip(names, watermarks)],
+            self._fetch_user_info(),
+        )
+
+        for name, collection in zip(names, results):
+            self._apply_collection(name, *collection)
+        self.user_info = results[-1]
+
+    async def new_device(self, nickname, manufacturer=None, model=None, icon="system"):
+        data = {"nickname": nickname, "icon": icon}
+        data.update({k: v for k, v in (("model", model), ("manufacturer", manufacturer)) if v is not None})
+        r = await self._request("post", self.DEVICES_URL, data=json.dumps(data))
+        if r.status_code == 200:
+            new_device = Device(self, r.json())
+            self._add_object("devices", new_device)
+            return new_device
+        else:
+            raise PushbulletError(r.text)
+
+    async def new_chat(self, name, email):
+        data = {"name": name, "email": email}
+        r = await self._request("post", self.CHATS_URL, data=json.dumps(data))
+        if r.status_code == 200:
+            new_chat = Chat(self, r.json())
+            self._add_object("chats", new_chat)
+            return new_chat
+        else:
+            raise PushbulletError(r.text)
+
+    async def edit_device(self, device, nickname=None, model=None, manufacturer=None, icon=None):
+        data = {
+            k: v
+            for k, v in (
+                ("nickname", nickname or device.nickname),
+                ("model", model),
+                ("manufacturer", manufacturer),
+                ("icon", icon),
+            )
+            if v is not None
+        }
+        iden = device.device_iden
+        r = await self._request("post", "{}/{}".format(self.DEVICES_URL, iden), idempotent=True, data=json.dumps(data))
+        if r.status_code == 200:
+            new_device = Device(self, r.json())
+            self._replace_object("devices", device, new_device)
+            return new_device
+        else:
+            raise PushbulletError(r.text)
+
+    async def edit_chat(self, chat, name, muted=None):
+        data = {"name": name}
+        if muted is not None:
+            data["muted"] = muted
+        iden = chat.iden
+        r = await self._request("post", "{}/{}".format(self.CHATS_URL, iden), idempotent=True, data=json.dumps(data))
+        if r.status_code == 200:
+            new_chat = Chat(self, r.json())
+            self._replace_object("chats", chat, new_chat)
+            return new_chat
+        else:
+            raise PushbulletError(r.text)
+
+    async def remove_device(self, device):
+        iden = device.device_iden
+        r = await self._request("delete", "{}/{}".format(self.DEVICES_URL, iden))
+        if r.status_code == 200:
+            self._remove_object("devices", device)
+        else:
+            raise PushbulletError(r.text)
+
+    async def remove_chat(self, chat):
+        iden = chat.iden
+        r = await self._request("delete", "{}/{}".format(self.CHATS_URL, iden))
+        if r.status_code == 200:
+            self._remove_object("chats", chat)
+            return True
+        else:
+            raise PushbulletError(r.text)
+
+    async def get_pushes(self, modified_after=None, limit=None, filter_inactive=True, as_objects=False):
+        """Collect the pushes of the account into a list, use :meth:`iter_pushes` to iterate over them instead."""
+        pushes = self.iter_pushes(modified_after, limit, filter_inactive, as_objects=as_objects)
+        return [push async for push in pushes]
+
+    async def dismiss_push(self, iden):
+        data = {"dismissed": True}
+        r = await self._request("post", "{}/{}".format(self.PUSH_URL, iden), idempotent=True, data=json.dumps(data))
+        if r.status_code != 200:
+            raise PushbulletError(r.text)
+
+    async def delete_push(self, iden):
+        r = await self._request("delete", "{}/{}".format(self.PUSH_URL, iden))
+        if r.status_code != 200:
+            raise PushbulletError(r.text)
+
+    async def delete_pushes(self):
+        r = await self._request("delete", self.PUSH_URL)
+        if r.status_code != 200:
+            raise PushbulletError(r.text)
+
+    async def upload_file(self, f, file_name, file_type=None, progress=None):
+        """
+        Upload a file so it can be pushed with :meth:`push_file`, see :meth:`Pushbullet.upload_file`.
+
+        :param progress: Function called with the number of bytes sent so far and the total size of the upload, from
+            the executor threads reading the file
+        """
+        # Sniffing and hashing the file, reading files that can't seek into memory and file caches all block, so they
+        # run in the executor instead of on the event loop
+        loop = asyncio.get_event_loop()
+        if not file_type:
+            file_type, f = await loop.run_in_executor(None, sniff_file_type, f, file_name)
+
+        cache_key = await loop.run_in_executor(None, self._upload_cache_key, f, file_name, file_type)
+        if cache_key is not None:
+            cached = await loop.run_in_executor(None, self.upload_cache.get, cache_key)
+            if cached is not None:
+                return cached
+
+        data = {"file_name": file_name, "file_type": file_type}
+
+        r = await self._request("post", self.UPLOAD_REQUEST_URL, idempotent=True, data=json.dumps(data))
+        if r.status_code != 200:
+            raise PushbulletError(r.text)
+
+        upload_request = r.json()
+        body = await loop.run_in_executor(
+            None, MultipartFileStream, upload_request.get("data"), f, file_name, file_type, progress
+        )
+
+        # Only the content headers, the API key isn't sent to the upload host
+        r = await self._request(
+            "post",
+            upload_request.get("upload_url"),
+            idempotent=True,
+            data=_UploadBody(body),
+            headers={"Content-Type": body.content_type, "Content-Length": str(body.len)},
+            paced=False,
+        )
+        if not 200 <= r.status_code < 300:
+            raise PushbulletError(r.text)
+
+        uploaded = {"file_type": file_type, "file_url": upload_request.get("file_url"), "file_name": file_name}
+        if cache_key is not None:
+            await loop.run_in_executor(None, self.upload_cache.set, cache_key, uploaded)
+        return uploaded
+
+    async def upload_files(self, files, concurrency=4):
+        """
+        Upload many files concurrently.
+
+        :param files: ``(f, file_name)`` or ``(f, file_name, file_type)`` tuples, like the arguments of
+            :meth:`upload_file`
+        :param concurrency: Number of files uploaded at the same time
+        :return: A list of ``(file, result, exception)`` tuples in the order of ``files``, where ``result`` is what
+            :meth:`upload_file` returns for the file. ``exception`` is ``None`` for successful uploads and
+            ``result`` for failed ones
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def upload(file):
+            async with semaphore:
+                try:
+                    return file, await self.upload_file(*file), None
+                except Exception as e:
+                    return file, None, e
+
+        return await asyncio.gather(*[upload(tuple(file)) for file in files])
+
+    async def push_many(self, payload, targets, concurrency=10):
+        """
+        Send the same push to many targets concurrently.
+
+        :param payload: Push data without recipient, e.g. ``{"type": "note", "title": "title", "body": "body"}``
+        :param targets: Devices, chats, channels or email addresses to push to
+        :param concurrency: Number of pushes sent at the same time
+        :return: A list of ``(target, response, exception)`` tuples in the order of ``targets``, ``exception`` is
+            ``None`` for successful pushes and ``response`` for failed ones
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def push(target):
+            async with semaphore:
+                try:
+                    return target, await self._push(self._target_data(payload, target)), None
+                except Exception as e:
+                    return target, None, e
+
+        return await asyncio.gather(*[push(target) for target in targets])
+
+    async def _push(self, data):
+        resp = await self._request("post", self.PUSH_URL, **self._push_request_args(data))
+        return self._check_push_response(resp)
+
+    async def push_sms(self, device, number, message):
+        if self._user_info is None:
+            self.user_info = await self._fetch_user_info()
+        await self._ensure_encryption_key()
+
+        r = await self._request("post", self.EPHEMERALS_URL, data=json.dumps(self._sms_data(device, number, message)))
+        if r.status_code == 200:
+            return r.json()
+        raise PushError(r.text)
+
+
+class AsyncListener(object):
+    """
+    The events of the Pushbullet stream as an async iterator, the asyncio counterpart of :class:`Listener`::
+
+        async with AsyncListener(pb) as listener:
+            async for event in listener:
+                print(event)
+
+    The stream is read in a background task that queues up to ``max_queue`` events, once the queue is full reading
+    waits for the consumer to catch up. Iterating ends when the listener is closed, or when the connection is lost
+    without ``reconnect``.
+    """
+
+    def __init__(self, account, reconnect=True, reconnect_delay=1.0, reconnect_max_delay=60.0, max_queue=100):
+        """
+        :param account: AsyncPushbullet object
+        :param reconnect: Reconnect when the connection is lost. After reconnecting, the pushes modified while
+            disconnected are fetched and yielded as ``{"type": "sync", "subtype": "push", "push": push}`` events
+        :param reconnect_delay: Delay before the first reconnect attempt, doubled for every failed attempt
+        :param reconnect_max_delay: Longest delay between two reconnect attempts
+        :param max_queue: Number of events read ahead of the consumer
+        """
+        self._account = account
+        self.reconnect = reconnect
+        self.reconnect_delay = reconnect_delay
+        self.reconnect_max_delay = reconnect_max_delay
+        self.max_queue = max_queue
+
+        self.connected = False
+        self.last_update = time.time()
+
+        self._queue = None
+        self._task = None
+        self._reconnect_attempt = 0
+        self._disconnected_since = None
+        # Modification time of the newest push fetched by the listener
+        self.watermark = None
+
+    def start(self):
+        """Start reading the stream, done by iterating over the listener too."""
+        if self._task is None:
+            self._queue = asyncio.Queue(self.max_queue)
+            self._task = asyncio.ensure_future(self._run())
+
+    async def close(self):
+        """Stop reading the stream, events that weren't consumed yet are dropped."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(_CLOSED)
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def __aiter__(self):
+        self.start()
+        return self
+
+    async def __anext__(self):
+        self.start()
+        event = await self._queue.get()
+        if event is _CLOSED:
+            # Later calls end right away too
+            self._queue.put_nowait(_CLOSED)
+            raise StopAsyncIteration
+        if isinstance(event, Exception):
+            self._queue.put_nowait(_CLOSED)
+            raise event
+        return event
+
+    async def _run(self):
+        try:
+            while True:
+                try:
+                    await self._listen()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    if not self.reconnect:
+                        raise
+                    log.warning("Listener connection failed: %r", e)
+                if not self.reconnect:
+                    break
+
+                self._reconnect_attempt += 1
+                delay = exponential_backoff(self._reconnect_attempt, self.reconnect_delay, self.reconnect_max_delay)
+                log.debug("Reconnecting in %.1f seconds", delay)
+                await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self._queue.put(e)
+            return
+        await self._queue.put(_CLOSED)
+
+    async def _listen(self):
+        url = WEBSOCKET_URL + self._account.api_key
+        async with self._account._get_session().ws_connect(url, proxy=self._account._proxy) as ws:
+            self.connected = True
+            self.last_update = time.time()
+            self._reconnect_attempt = 0
+            try:
+                if self._disconnected_since is not None:
+                    await self._catch_up(catch_up_after(self._disconnected_since, self.watermark))
+                    self._disconnected_since = None
+
+                async for message in ws:
+                    self.last_update = time.time()
+                    if message.type != aiohttp.WSMsgType.TEXT:
+                        continue
+                    try:
+                        event = decode_message(message.data)
+                    except (ValueError, KeyError) as e:
+                        log.exception(e)
+                        continue
+                    if event is not None:
+                        await self._queue.put(event)
+            finally:
+                if self.connected and self._disconnected_since is None:
+                    self._disconnected_since = self.last_update
+                self.connected = False
+
+    async def _catch_up(self, modified_after):
+        pushes = await self._account.get_pushes(modified_after=modified_after, filter_inactive=False)
+        events, self.watermark = sync_events(pushes, self.watermark)
+        for event in events:
+            await self._queue.put(event)
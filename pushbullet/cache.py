@@ -0,0 +1,100 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryCache(object):
+    """
+    A thread safe in-memory cache that drops the least recently used entries once it holds ``maxsize`` of them.
+
+    Caches used by the client only need ``get(key)`` and ``set(key, value)``, any object providing them can be used
+    instead, e.g. to share entries between processes.
+    """
+
+    def __init__(self, maxsize=128, ttl=None):
+        """
+        :param maxsize: Maximum number of entries kept
+        :param ttl: Number of seconds an entry is valid for, entries don't expire if not given
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """The value stored for ``key``, ``None`` if there is none or it expired."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires is not None and expires <= time.time():
+                return None
+            self._entries[key] = entry
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (_expires(self.ttl), value)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class FileCache(object):
+    """
+    A cache kept in a JSON file, so entries survive restarts. The file is only readable by its owner.
+
+    Values need to be serializable to JSON.
+    """
+
+    def __init__(self, path, ttl=None):
+        """
+        :param path: Path of the cache file, created if it doesn't exist
+        :param ttl: Number of seconds an entry is valid for, entries don't expire if not given
+        """
+        self.path = os.path.expanduser(path)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """The value stored for ``key``, ``None`` if there is none or it expired."""
+        with self._lock:
+            entry = self._read().get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires is not None and expires <= time.time():
+            return None
+        return value
+
+    def set(self, key, value):
+        with self._lock:
+            now = time.time()
+            entries = {k: v for k, v in self._read().items() if v[0] is None or v[0] > now}
+            entries[key] = [_expires(self.ttl), value]
+            self._write(entries)
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def _write(self, entries):
+        tmp_path = self.path + ".tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(entries, f)
+        # Python 2 has no os.replace, its os.rename only overwrites on POSIX
+        getattr(os, "replace", os.rename)(tmp_path, self.path)
+
+
+def _expires(ttl):
+    return None if ttl is None else time.time() + ttl
@@ -1,15 +1,24 @@
 from __future__ import unicode_literals
 
-from .helpers import use_appropriate_encoding
+from .helpers import IdenEquality, use_appropriate_encoding
 
 
-class Channel(object):
+class Channel(IdenEquality):
+    __slots__ = ("_account", "iden", "channel_tag", "name", "description", "created", "modified")
+
     def __init__(self, account, channel_info):
+        get = channel_info.get
         self._account = account
-        self.channel_tag = channel_info.get("tag")
-
-        for attr in ("name", "description", "created", "modified"):
-            setattr(self, attr, channel_info.get(attr))
+        self.iden = get("iden")
+        self.channel_tag = get("tag")
+        self.name = get("name")
+        self.description = get("description")
+        self.created = get("created")
+        self.modified = get("modified")
+
+    @property
+    def _iden(self):
+        return self.iden
 
     def push_note(self, title, body):
         data = {"type": "note", "title": title, "body": body}
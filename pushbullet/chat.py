@@ -5,15 +5,25 @@ from .helpers import use_appropriate_encoding
 
 
 class Chat(Device):
+    __slots__ = ("iden", "muted", "name", "email", "email_normalized", "image_url")
+
     def __init__(self, account, chat_info):
+        get = chat_info.get
         self._account = account
-        self.iden = chat_info.get("iden")
+        self.iden = get("iden")
+        self.created = get("created")
+        self.modified = get("modified")
+        self.muted = get("muted")
 
         contact_info = chat_info["with"]
-        for attr in ("created", "modified", "muted"):
-            setattr(self, attr, chat_info.get(attr))
-        for attr in ("name", "email", "email_normalized", "image_url"):
-            setattr(self, attr, contact_info.get(attr))
+        self.name = contact_info.get("name")
+        self.email = contact_info.get("email")
+        self.email_normalized = contact_info.get("email_normalized")
+        self.image_url = contact_info.get("image_url")
+
+    @property
+    def _iden(self):
+        return self.iden
 
     def _push(self, data):
         data["email"] = self.email
@@ -0,0 +1,121 @@
+import hashlib
+import os
+from binascii import a2b_base64
+
+from ._compat import standard_b64encode
+from .errors import DecryptionError, NoEncryptionModuleError
+
+VERSION = b"1"
+TAG_SIZE = 16
+IV_SIZE = 12
+
+# Offsets of the parts of an encrypted message
+_TAG_START = len(VERSION)
+_IV_START = _TAG_START + TAG_SIZE
+_CIPHERTEXT_START = _IV_START + IV_SIZE
+
+
+def require_cryptography():
+    """Raise NoEncryptionModuleError if cryptography can't be imported."""
+    try:
+        from cryptography.hazmat.primitives import hashes  # noqa: F401
+    except ImportError as e:
+        raise NoEncryptionModuleError(str(e))
+
+
+def derive_key(password, salt):
+    """The end-to-end encryption key for ``password``, the salt is the iden of the user."""
+    require_cryptography()
+
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt.encode("ASCII"),
+        iterations=30000,
+        backend=default_backend(),
+    )
+    return kdf.derive(password.encode("UTF-8"))
+
+
+def cached_key(cache, password, salt):
+    """
+    Like :func:`derive_key`, but returns the key stored in ``cache`` by an earlier call for the same password and
+    salt. The cache is keyed by a hash of both, keys are stored base64 encoded.
+    """
+    cache_key = hashlib.sha256(salt.encode("UTF-8") + b"\0" + password.encode("UTF-8")).hexdigest()
+    key = cache.get(cache_key)
+    if key is not None:
+        return a2b_base64(key)
+
+    key = derive_key(password, salt)
+    cache.set(cache_key, standard_b64encode(key).decode("ASCII"))
+    return key
+
+
+class EncryptionEngine(object):
+    """
+    Encrypts and decrypts end-to-end encrypted messages with an AES-GCM cipher that is set up once for the key.
+
+    Messages are base64 encoded ``version + tag + iv + ciphertext``, see
+    https://docs.pushbullet.com/#end-to-end-encryption
+    """
+
+    def __init__(self, key):
+        """
+        :param key: 32 byte key, as returned by :func:`derive_key`
+        """
+        try:
+            from cryptography.exceptions import InvalidTag
+            from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+        except ImportError as e:
+            raise NoEncryptionModuleError(str(e))
+
+        self.key = key
+        self._aesgcm = AESGCM(key)
+        self._invalid_tag = InvalidTag
+
+    def encrypt(self, message):
+        """
+        :param message: Text to encrypt
+        :return: The encrypted message as base64 encoded text
+        """
+        iv = os.urandom(IV_SIZE)
+        # AESGCM appends the tag to the ciphertext, Pushbullet expects it in front of the iv
+        sealed = memoryview(self._aesgcm.encrypt(iv, message.encode("UTF-8"), None))
+        encoded = bytearray(VERSION)
+        encoded += sealed[-TAG_SIZE:]
+        encoded += iv
+        encoded += sealed[:-TAG_SIZE]
+        return standard_b64encode(bytes(encoded)).decode("ASCII")
+
+    def decrypt(self, message):
+        """
+        :param message: Base64 encoded encrypted message
+        :return: The decrypted text
+        :raises DecryptionError: If the message is not encrypted with a supported version or with this key
+        """
+        encoded = memoryview(a2b_base64(message))
+        version = encoded[:_TAG_START].tobytes()
+        if version != VERSION:
+            raise DecryptionError("Unsupported encryption version: %r" % version)
+
+        # Slices of the memoryview don't copy the message, only the ciphertext is copied once to append the tag
+        sealed = bytearray(encoded[_CIPHERTEXT_START:])
+        sealed += encoded[_TAG_START:_IV_START]
+        try:
+            decrypted = self._aesgcm.decrypt(encoded[_IV_START:_CIPHERTEXT_START], sealed, None)
+        except self._invalid_tag:
+            raise DecryptionError("The message could not be decrypted with this key")
+        return decrypted.decode("UTF-8")
+
+    def encrypt_many(self, messages):
+        """Encrypt every message of ``messages``, see :meth:`encrypt`."""
+        return [self.encrypt(message) for message in messages]
+
+    def decrypt_many(self, messages):
+        """Decrypt every message of ``messages``, see :meth:`decrypt`."""
+        return [self.decrypt(message) for message in messages]
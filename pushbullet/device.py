@@ -1,30 +1,48 @@
 from __future__ import unicode_literals
 
-from .helpers import use_appropriate_encoding
+from .helpers import IdenEquality, use_appropriate_encoding
 
 
-class Device(object):
+class Device(IdenEquality):
+    __slots__ = (
+        "_account",
+        "device_iden",
+        "push_token",
+        "app_version",
+        "fingerprint",
+        "created",
+        "modified",
+        "active",
+        "nickname",
+        "generated_nickname",
+        "manufacturer",
+        "icon",
+        "model",
+        "has_sms",
+        "key_fingerprint",
+    )
+
     def __init__(self, account, device_info):
+        get = device_info.get
         self._account = account
-        self.device_iden = device_info.get("iden")
-        if not device_info.get("icon", None):
-            device_info["icon"] = "system"
-        for attr in (
-            "push_token",
-            "app_version",
-            "fingerprint",
-            "created",
-            "modified",
-            "active",
-            "nickname",
-            "generated_nickname",
-            "manufacturer",
-            "icon",
-            "model",
-            "has_sms",
-            "key_fingerprint",
-        ):
-            setattr(self, attr, device_info.get(attr))
+        self.device_iden = get("iden")
+        self.push_token = get("push_token")
+        self.app_version = get("app_version")
+        self.fingerprint = get("fingerprint")
+        self.created = get("created")
+        self.modified = get("modified")
+        self.active = get("active")
+        self.nickname = get("nickname")
+        self.generated_nickname = get("generated_nickname")
+        self.manufacturer = get("manufacturer")
+        self.icon = get("icon") or "system"
+        self.model = get("model")
+        self.has_sms = get("has_sms")
+        self.key_fingerprint = get("key_fingerprint")
+
+    @property
+    def _iden(self):
+        return self.device_iden
 
     def push_note(self, title, body, source=None):
         data = {"type": "note", "title": title, "body": body}
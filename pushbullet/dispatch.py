@@ -0,0 +1,129 @@
+import itertools
+import logging
+import threading
+
+from ._compat import queue
+
+log = logging.getLogger("pushbullet.Dispatcher")
+
+BLOCK = "block"
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+
+# Put on the queue of a worker to stop it, workers with a full queue stop once it ran empty instead
+_STOP = object()
+
+
+def device_key(event):
+    """Key ordering the events of each device, for events about pushes and ephemerals sent from a device."""
+    push = event.get("push") or {}
+    return push.get("source_device_iden")
+
+
+class Dispatcher(object):
+    """
+    Hands events to ``handler`` on a pool of worker threads, so a slow handler doesn't hold up the thread receiving
+    the events.
+
+    Every worker has its own bounded queue. Events with the same ``key`` always go to the same worker and are
+    handled in the order they were dispatched, events without a key are spread over the workers.
+    """
+
+    def __init__(self, handler, workers=4, max_queue=100, overflow=BLOCK, key=None, on_error=None):
+        """
+        :param handler: Function called with every event
+        :param workers: Number of worker threads
+        :param max_queue: Number of events queued per worker
+        :param overflow: What to do with an event when the queue of its worker is full: ``"block"`` waits for room,
+            ``"drop_oldest"`` drops the oldest queued event and ``"drop_newest"`` drops the new event
+        :param key: Function returning the ordering key of an event, e.g. :func:`device_key`. ``None`` keys are not
+            ordered
+        :param on_error: Function called with the exceptions raised by ``handler``, they are logged if not given
+        """
+        if overflow not in (BLOCK, DROP_OLDEST, DROP_NEWEST):
+            raise ValueError("Unknown overflow policy: %r" % (overflow,))
+
+        self.handler = handler
+        self.overflow = overflow
+        self.key = key
+        self.on_error = on_error
+        self.dropped = 0
+
+        self._queues = [queue.Queue(max_queue) for _ in range(workers)]
+        self._next_worker = itertools.cycle(range(workers))
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._threads = []
+        for q in self._queues:
+            thread = threading.Thread(target=self._work, args=(q,))
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def dispatch(self, event):
+        """Queue ``event`` for its worker, as the overflow policy allows. Events are dropped once closed."""
+        if self._closed.is_set():
+            return
+        q = self._queues[self._worker(event)]
+
+        if self.overflow == BLOCK:
+            q.put(event)
+            return
+
+        while True:
+            try:
+                q.put_nowait(event)
+                return
+            except queue.Full:
+                if self.overflow == DROP_NEWEST:
+                    self._drop(event)
+                    return
+            try:
+                self._drop(q.get_nowait())
+            except queue.Empty:
+                pass
+
+    def close(self, wait=True):
+        """
+        Stop the workers once they handled the events queued so far.
+
+        :param wait: Wait for the workers to stop
+        """
+        self._closed.set()
+        for q in self._queues:
+            try:
+                q.put_nowait(_STOP)
+            except queue.Full:
+                # Waiting for room could block forever when called from the thread dispatching events
+                pass
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _worker(self, event):
+        key = self.key(event) if self.key is not None else None
+        if key is None:
+            with self._lock:
+                return next(self._next_worker)
+        return hash(key) % len(self._queues)
+
+    def _drop(self, event):
+        with self._lock:
+            self.dropped += 1
+        log.warning("Dropped event, the handler is falling behind: %r", event)
+
+    def _work(self, q):
+        while not (self._closed.is_set() and q.empty()):
+            event = q.get()
+            if event is _STOP:
+                return
+            try:
+                self.handler(event)
+            except Exception as e:
+                if self.on_error is None:
+                    log.exception(e)
+                    continue
+                try:
+                    self.on_error(e)
+                except Exception as e:
+                    log.exception(e)
@@ -10,6 +10,10 @@ class PushError(PushbulletError):
     pass
 
 
+class DecryptionError(PushbulletError):
+    pass
+
+
 class NoEncryptionModuleError(Exception):
     def __init__(self, msg):
         super(NoEncryptionModuleError, self).__init__(
@@ -17,3 +21,12 @@ class NoEncryptionModuleError(Exception):
             + msg
             + "\nYou can install it by running 'pip install cryptography'"
         )
+
+
+class NoAsyncModuleError(Exception):
+    def __init__(self, msg):
+        super(NoAsyncModuleError, self).__init__(
+            "aiohttp is required for asyncio support and could not be imported: "
+            + msg
+            + "\nYou can install it by running 'pip install aiohttp'"
+        )
@@ -1,16 +1,144 @@
-try:
-    from magic import from_buffer as magic_from_buffer
-except ImportError:
-    import mimetypes
+import io
+import mimetypes
+import os
+
+from ._compat import string_types
+from .cache import MemoryCache
+
+SNIFF_SIZE = 1024
+
+# File types sniffed by libmagic, keyed by the path, size and modification time of the file
+_sniffed_types = MemoryCache(maxsize=1024)
+
+_magic_from_buffer = None
+
+
+def _load_magic():
+    """libmagic's ``from_buffer``, imported on first use. ``None`` if python-magic is not installed."""
+    global _magic_from_buffer
+    if _magic_from_buffer is None:
+        try:
+            from magic import from_buffer
+        except ImportError:
+            from_buffer = False
+        _magic_from_buffer = from_buffer
+    return _magic_from_buffer or None
 
 
 def get_file_type(file, filename):
+    """
+    MIME type of ``file``, guessed from the extension of ``filename`` and sniffed from the contents of the file if
+    the extension is unknown.
+
+    Sniffing reads from a file that can't seek (like a pipe) can't be undone, use :func:`sniff_file_type` for those.
+    """
+    return sniff_file_type(file, filename)[0]
+
+
+def sniff_file_type(file, filename):
+    """
+    Like :func:`get_file_type`, but also works for pipes and iterators of bytes.
+
+    :return: The MIME type and a file object to read the file from. For files that can't seek it replays the bytes
+        that were read to sniff the type before the rest of the file.
+    """
+    file_type = mimetypes.guess_type(filename)[0]
+    if file_type is not None:
+        return file_type, file
+
+    magic_from_buffer = _load_magic()
+    if magic_from_buffer is None:
+        return None, file
+
+    if not _seekable(file):
+        stream = _PrefixedStream(file)
+        return maybe_decode(magic_from_buffer(stream.peek(SNIFF_SIZE), mime=True)), stream
+
+    key = _cache_key(file)
+    file_type = _sniffed_types.get(key) if key is not None else None
+    if file_type is None:
+        position = file.tell()
+        file_type = maybe_decode(magic_from_buffer(file.read(SNIFF_SIZE), mime=True))
+        file.seek(position)
+        if key is not None:
+            _sniffed_types.set(key, file_type)
+    return file_type, file
+
+
+def _seekable(file):
+    seekable = getattr(file, "seekable", None)
+    if seekable is not None:
+        return seekable()
     try:
-        file_type = magic_from_buffer(file.read(1024), mime=True)
-        file.seek(0)
-        return maybe_decode(file_type)
-    except NameError:
-        return mimetypes.guess_type(filename)[0]
+        file.tell()
+        return hasattr(file, "seek")
+    except (AttributeError, OSError, IOError, ValueError):
+        return False
+
+
+def _cache_key(file):
+    """``(path, size, mtime, position)`` of files opened from a path, ``None`` for other files."""
+    try:
+        stat = os.fstat(file.fileno())
+    except (AttributeError, OSError, IOError, ValueError, io.UnsupportedOperation):
+        return None
+    name = getattr(file, "name", None)
+    if not isinstance(name, string_types):
+        return None
+    return (os.path.abspath(name), stat.st_size, stat.st_mtime, file.tell())
+
+
+class _PrefixedStream(io.RawIOBase):
+    """A readable stream over a file or an iterator of bytes that allows looking ahead without consuming bytes."""
+
+    def __init__(self, source):
+        super(_PrefixedStream, self).__init__()
+        self._read = source.read if hasattr(source, "read") else _iterator_reader(iter(source))
+        self._buffer = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[: len(data)] = data
+        return len(data)
+
+    def peek(self, size):
+        while len(self._buffer) < size:
+            chunk = self._read(size - len(self._buffer))
+            if not chunk:
+                break
+            self._buffer += chunk
+        return self._buffer[:size]
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            data, self._buffer = self._buffer + self._read(), b""
+            return data
+        if not self._buffer:
+            return self._read(size)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def _iterator_reader(chunks):
+    pending = [b""]
+
+    def read(size=-1):
+        data = pending[0]
+        while size is None or size < 0 or len(data) < size:
+            chunk = next(chunks, None)
+            if chunk is None:
+                break
+            data += chunk
+        if size is None or size < 0:
+            pending[0] = b""
+            return data
+        pending[0] = data[size:]
+        return data[:size]
+
+    return read
 
 
 # return str on python3.  Don't want to unconditionally
@@ -1,6 +1,7 @@
 from __future__ import unicode_literals
 
 import sys
+import threading
 
 
 def use_appropriate_encoding(fn):
@@ -13,3 +14,64 @@ def use_appropriate_encoding(fn):
         return _fn
     else:
         return fn
+
+
+class IdenEquality(object):
+    """Objects of the API compare equal when they are of the same type and have the same ``_iden``."""
+
+    __slots__ = ()
+
+    # Objects without an iden (not created through the API) are only equal to themselves
+    def __eq__(self, other):
+        if type(self) is not type(other) or self._iden is None:
+            return self is other
+        return self._iden == other._iden
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        if self._iden is None:
+            return object.__hash__(self)
+        return hash(self._iden)
+
+
+def header_number(headers, name):
+    """Value of a numeric response header, ``None`` if it is missing or malformed."""
+    try:
+        return float(headers.get(name))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def map_concurrently(fn, items, concurrency=None):
+    """
+    Call ``fn`` on every item of ``items`` using at most ``concurrency`` threads (one thread per item by default).
+
+    Returns a list of ``(result, exception)`` tuples in the order of ``items``; exactly one of the two is ``None``.
+    """
+    items = list(items)
+    results = [None] * len(items)
+    work = iter(enumerate(items))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                try:
+                    i, item = next(work)
+                except StopIteration:
+                    return
+            try:
+                results[i] = (fn(item), None)
+            except Exception as e:
+                results[i] = (None, e)
+
+    threads = [threading.Thread(target=worker) for _ in range(min(concurrency or len(items), len(items)))]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return results
@@ -3,17 +3,82 @@ __author__ = "Igor Maculan <n3wtron@gmail.com>"
 import json
 import logging
 import time
-from threading import Thread
+from threading import Event, Lock, Thread, Timer
 
 import websocket
 
+from .dispatch import BLOCK, Dispatcher
+from .retry import exponential_backoff
+
 log = logging.getLogger("pushbullet.Listener")
 
 WEBSOCKET_URL = "wss://stream.pushbullet.com/websocket/"
 
+# Seconds between the nop messages the stream sends to show the connection is alive
+NOP_INTERVAL = 30
+
+# Seconds the local clock may be off from the server's, when the local time stands in for a push modification time
+CLOCK_SKEW = 60
+
+
+def decode_message(message):
+    """The event sent in a stream message, ``None`` for the ``nop`` messages that keep the connection alive."""
+    event = json.loads(message)
+    if event["type"] == "nop":
+        return None
+    return event
+
+
+def _coalesced(event):
+    return event["type"] == "tickle" and event.get("subtype") in ("push", "device")
+
+
+def catch_up_after(disconnected_since, watermark):
+    """
+    Modification time after which the pushes missed while disconnected are fetched. ``disconnected_since`` is local
+    time, so it is moved back by :data:`CLOCK_SKEW`, but not before the newest push fetched so far (``watermark``).
+    """
+    modified_after = disconnected_since - CLOCK_SKEW
+    if watermark is None:
+        return modified_after
+    return max(modified_after, watermark)
+
+
+def sync_event(push):
+    """Event passed on for a push fetched after reconnecting, it may have been missed while disconnected."""
+    return {"type": "sync", "subtype": "push", "push": push}
+
+
+def sync_events(pushes, watermark):
+    """
+    The :func:`sync_event` of every push of ``pushes``, as returned by the API newest first.
+
+    :param watermark: Modification time of the newest push fetched before
+    :return: The events oldest first, like they would have arrived, and the watermark moved to the newest push
+    """
+    if pushes:
+        watermark = max(watermark or 0, max(push.get("modified", 0) for push in pushes))
+    return [sync_event(push) for push in reversed(pushes)], watermark
+
 
 class Listener(Thread, websocket.WebSocketApp):
-    def __init__(self, account, on_push=None, on_error=None, http_proxy_host=None, http_proxy_port=None):
+    def __init__(
+        self,
+        account,
+        on_push=None,
+        on_error=None,
+        http_proxy_host=None,
+        http_proxy_port=None,
+        reconnect=None,
+        reconnect_delay=1.0,
+        reconnect_max_delay=60.0,
+        workers=0,
+        max_queue=100,
+        overflow=BLOCK,
+        order_by=None,
+        coalesce=None,
+        watchdog=None,
+    ):
         """
         :param account: Pushbullet object
         :param on_push: Function that gets called on all pushes. It takes one parameter as an argument - the data
@@ -22,10 +87,28 @@ class Listener(Thread, websocket.WebSocketApp):
             the exception triggered by the application
         :param http_proxy_host: Host proxy (ie localhost)
         :param http_proxy_port: Host port (ie 3128)
+        :param reconnect: Reconnect when the connection is lost, until :meth:`close` is called. After reconnecting,
+            the pushes modified while disconnected are fetched and passed to ``on_push`` as
+            ``{"type": "sync", "subtype": "push", "push": push}``. Defaults to reconnecting only with ``watchdog``
+        :param reconnect_delay: Delay before the first reconnect attempt, doubled for every failed attempt
+        :param reconnect_max_delay: Longest delay between two reconnect attempts
+        :param workers: Call ``on_push`` on this many worker threads instead of the thread receiving the events, so
+            slow handlers don't hold up the connection. See :class:`pushbullet.dispatch.Dispatcher`
+        :param max_queue: Number of events queued per worker
+        :param overflow: What to do with events when the queue of a worker is full, ``"block"``, ``"drop_oldest"``
+            or ``"drop_newest"``
+        :param order_by: Function returning a key for an event, events with the same key are handled in order, e.g.
+            :func:`pushbullet.dispatch.device_key`
+        :param coalesce: Fetch the pushes modified since the last fetch at most once per this many seconds when
+            pushes change, and pass them to ``on_push`` as ``{"type": "sync", "subtype": "push", "push": push}``
+            instead of the ``push`` tickles. Devices are reloaded the same way before ``device`` tickles are passed on
+        :param watchdog: Drop the connection when nothing was received for this many nop intervals (30 seconds), as
+            it is most likely dead, and connect again
         """
         self._account = account
         self._api_key = self._account.api_key
-        self.on_error = on_error
+        # Not stored as on_error, WebSocketApp uses that name for its own callback
+        self._error_handler = on_error
 
         Thread.__init__(self)
         websocket.WebSocketApp.__init__(
@@ -39,8 +122,44 @@ class Listener(Thread, websocket.WebSocketApp):
 
         self.connected = False
         self.last_update = time.time()
+        self._connected_at = None
+        self.watchdog = watchdog
+        self._watchdog_thread = None
+        self._watchdog_stop = None
+
+        if reconnect is None:
+            # Dropping a dead connection is only useful when a new one replaces it
+            reconnect = watchdog is not None
+        elif watchdog is not None and not reconnect:
+            log.warning("The watchdog stops the listener for good without reconnect")
+        self.reconnect = reconnect
+        self.reconnect_delay = reconnect_delay
+        self.reconnect_max_delay = reconnect_max_delay
+        self._closed = Event()
+        self._reconnect_attempt = 0
+        # Local time of the last frame of the previous connection, the pushes modified after it may have been missed
+        self._disconnected_since = None
+
+        self.coalesce = coalesce
+        # Modification time of the newest push fetched by the listener
+        self.watermark = None
+        self._pending_tickles = {}
+        self._tickle_lock = Lock()
+        self._fetch_lock = Lock()
+        # Without workers, events come from the connection and the coalescing timers, on_push sees one at a time
+        self._deliver_lock = Lock()
 
         self.on_push = on_push
+        self._dispatcher = None
+        if workers:
+            self._dispatcher = Dispatcher(
+                lambda event: self.on_push(event),
+                workers=workers,
+                max_queue=max_queue,
+                overflow=overflow,
+                key=order_by,
+                on_error=self._report_error,
+            )
 
         # History
         self.history = None
@@ -62,25 +181,95 @@ class Listener(Thread, websocket.WebSocketApp):
     def _on_open(self):
         def callback(*_):
             self.connected = True
-            self.last_update = time.time()
+            self.last_update = self._connected_at = time.time()
+            self._reconnect_attempt = 0
+            if self._disconnected_since is not None:
+                if self.coalesce is not None and self.watermark is not None:
+                    modified_after = self.watermark
+                else:
+                    modified_after = catch_up_after(self._disconnected_since, self.watermark)
+                self._catch_up(modified_after)
+                self._disconnected_since = None
 
         return callback
 
     def _on_close(self):
         def callback(*_):
             log.debug("Listener closed")
+            if self.connected and self.reconnect:
+                self._disconnected_since = self.last_update
             self.connected = False
 
         return callback
 
+    def _catch_up(self, modified_after):
+        try:
+            with self._fetch_lock:
+                self._sync_pushes(modified_after)
+        except Exception as e:
+            self._report_error(e)
+
+    def _seed_watermark(self):
+        """Start the watermark at the newest push on the server, push modification times come from its clock."""
+        try:
+            pushes = self._account.get_pushes(limit=1, filter_inactive=False)
+        except Exception as e:
+            self._report_error(e)
+            self.watermark = time.time() - CLOCK_SKEW
+            return
+        self.watermark = pushes[0].get("modified", 0) if pushes else 0
+
+    def _sync_pushes(self, modified_after):
+        pushes = self._account.get_pushes(modified_after=modified_after, filter_inactive=False)
+        events, self.watermark = sync_events(pushes, self.watermark)
+        for event in events:
+            self._deliver(event)
+
+    def _on_tickle(self, subtype):
+        with self._tickle_lock:
+            if subtype in self._pending_tickles:
+                return
+            timer = Timer(self.coalesce, self._flush_tickles, args=(subtype,))
+            timer.daemon = True
+            self._pending_tickles[subtype] = timer
+        timer.start()
+
+    def _flush_tickles(self, subtype):
+        with self._tickle_lock:
+            # Tickles arriving from now on schedule another fetch
+            self._pending_tickles.pop(subtype, None)
+        if self._closed.is_set():
+            return
+        try:
+            with self._fetch_lock:
+                if subtype == "push":
+                    self._sync_pushes(self.watermark)
+                else:
+                    self._account._load_devices(incremental=True)
+                    self._deliver({"type": "tickle", "subtype": subtype})
+        except Exception as e:
+            self._report_error(e)
+
+    def _deliver(self, event):
+        if self._dispatcher is None:
+            with self._deliver_lock:
+                self.on_push(event)
+        elif not self._closed.is_set():
+            self._dispatcher.dispatch(event)
+
     def _on_message(self):
         def callback(*args):
             message = args[1] if len(args) > 1 else args[0]
             log.debug("Message received:" + message)
+            self.last_update = time.time()
             try:
-                json_message = json.loads(message)
-                if json_message["type"] != "nop":
-                    self.on_push(json_message)
+                json_message = decode_message(message)
+                if json_message is None:
+                    return
+                if self.coalesce is not None and _coalesced(json_message):
+                    self._on_tickle(json_message["subtype"])
+                else:
+                    self._deliver(json_message)
             except Exception as e:
                 logging.exception(e)
 
@@ -88,24 +277,95 @@ class Listener(Thread, websocket.WebSocketApp):
 
     def _on_error(self):
         def callback(*args):
-            err = args[1] if len(args) > 1 else args[0]
-            try:
-                self.on_error(err)
-            except Exception as e:
-                logging.exception(e)
+            self._report_error(args[1] if len(args) > 1 else args[0])
 
         return callback
 
+    def _report_error(self, err):
+        if self._error_handler is None:
+            log.error("Listener error: %r", err)
+            return
+        try:
+            self._error_handler(err)
+        except Exception as e:
+            logging.exception(e)
+
+    @property
+    def connection_age(self):
+        """Seconds since the current connection was opened, ``None`` while disconnected."""
+        if not self.connected:
+            return None
+        return time.time() - self._connected_at
+
+    @property
+    def idle_time(self):
+        """Seconds since the last message was received."""
+        return time.time() - self.last_update
+
+    def _start_watchdog(self):
+        if self.watchdog is None or self._watchdog_thread is not None:
+            return
+        # Every watchdog thread gets its own event, so a stopped one can't be revived by the next one starting
+        self._watchdog_stop = Event()
+        self._watchdog_thread = Thread(target=self._watch, args=(self._watchdog_stop,))
+        self._watchdog_thread.daemon = True
+        self._watchdog_thread.start()
+
+    def _stop_watchdog(self):
+        if self._watchdog_thread is None:
+            return
+        self._watchdog_stop.set()
+        self._watchdog_thread = None
+
+    def _watch(self, stop):
+        timeout = self.watchdog * NOP_INTERVAL
+        while not stop.wait(timeout / 4.0):
+            if self.connected and self.idle_time > timeout:
+                log.warning("Nothing received for %.0f seconds, dropping the connection", self.idle_time)
+                # Not self.close(), that would stop reconnecting too
+                websocket.WebSocketApp.close(self)
+
     def run_forever(self, sockopt=None, sslopt=None, ping_interval=0, ping_timeout=None, *args, **kwargs):
-        websocket.WebSocketApp.run_forever(
-            self,
-            sockopt=sockopt,
-            sslopt=sslopt,
-            ping_interval=ping_interval,
-            ping_timeout=ping_timeout,
-            http_proxy_host=self.http_proxy_host,
-            http_proxy_port=self.http_proxy_port,
-        )
+        self._start_watchdog()
+        try:
+            self._connect_until_closed(sockopt, sslopt, ping_interval, ping_timeout)
+        finally:
+            self._stop_watchdog()
+
+    def _connect_until_closed(self, sockopt, sslopt, ping_interval, ping_timeout):
+        if self.coalesce is not None and self.watermark is None:
+            # Before connecting, the tickles of pushes modified from now on find them newer than the watermark
+            self._seed_watermark()
+        while not self._closed.is_set():
+            websocket.WebSocketApp.run_forever(
+                self,
+                sockopt=sockopt,
+                sslopt=sslopt,
+                ping_interval=ping_interval,
+                ping_timeout=ping_timeout,
+                http_proxy_host=self.http_proxy_host,
+                http_proxy_port=self.http_proxy_port,
+            )
+            if not self.reconnect:
+                return
+
+            self._reconnect_attempt += 1
+            delay = exponential_backoff(self._reconnect_attempt, self.reconnect_delay, self.reconnect_max_delay)
+            log.debug("Reconnecting in %.1f seconds", delay)
+            self._closed.wait(delay)
+
+    def close(self, **kwargs):
+        """Close the connection and stop reconnecting."""
+        closing = not self._closed.is_set()
+        self._closed.set()
+        websocket.WebSocketApp.close(self, **kwargs)
+        with self._tickle_lock:
+            for timer in self._pending_tickles.values():
+                timer.cancel()
+            self._pending_tickles.clear()
+        if self._dispatcher is not None and closing:
+            # The events received so far are still handled
+            self._dispatcher.close(wait=False)
 
     def run(self):
         self.run_forever()
@@ -0,0 +1,86 @@
+import itertools
+
+
+class PageIterator(object):
+    """
+    Iterates over the objects returned by a paginated list endpoint.
+
+    Pages are only requested as the iterator is consumed and every page is dropped once its objects have been
+    handed out. ``cursor`` holds the cursor the page currently being consumed was fetched with and ``offset`` the
+    number of its objects handed out so far, both can be passed back in to continue after the last object returned.
+    """
+
+    def __init__(self, account, url, key, params=None, page_size=None, limit=None, cursor=None, offset=0, model=None):
+        """
+        :param account: Pushbullet object
+        :param url: URL of the list endpoint
+        :param key: Key of the object list in the response
+        :param params: Query parameters sent with every page request
+        :param page_size: Number of objects requested per page, the server default is used if not set
+        :param limit: Stop after this many objects
+        :param cursor: Cursor of the first page to fetch
+        :param offset: Number of objects of the first page to skip
+        :param model: Class the objects are wrapped in, called with the account and the object dictionary
+        """
+        self._account = account
+        self._url = url
+        self._key = key
+        self._params = dict(params or {})
+        self._model = model
+        if page_size:
+            self._params["limit"] = page_size
+
+        self.limit = limit
+        self.cursor = cursor
+        self.offset = offset
+        self.count = 0
+
+        self._next_cursor = cursor
+        self._skip = offset
+
+        self._page = iter(())
+        self._last_page = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.limit is not None and self.count >= self.limit:
+            raise StopIteration
+
+        while True:
+            try:
+                item = next(self._page)
+                break
+            except StopIteration:
+                if self._last_page:
+                    raise
+                self._fetch_page()
+
+        self.count += 1
+        self.offset += 1
+        return item
+
+    next = __next__
+
+    def _fetch_page(self):
+        self._set_page(self._account._get_data(self._url, self._page_params()))
+
+    def _page_params(self):
+        params = dict(self._params)
+        if self._next_cursor:
+            params["cursor"] = self._next_cursor
+        return params or None
+
+    def _set_page(self, page):
+        self.cursor = self._next_cursor
+        self._next_cursor = page.get("cursor")
+        self._last_page = not self._next_cursor
+
+        # Only the first page of a resumed iterator has objects that were already handed out
+        self.offset, self._skip = self._skip, 0
+        items = itertools.islice(page.get(self._key) or [], self.offset, None)
+        if self._model is None:
+            self._page = iter(items)
+        else:
+            self._page = (self._model(self._account, item) for item in items)
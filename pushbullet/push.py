@@ -0,0 +1,103 @@
+from __future__ import unicode_literals
+
+from functools import total_ordering
+
+from .errors import PushbulletError
+from .helpers import use_appropriate_encoding
+
+
+def _field(key):
+    return property(lambda self: self.data.get(key))
+
+
+@total_ordering
+class Push(object):
+    """
+    A push as returned by the API.
+
+    Fields are looked up in the raw push dictionary, kept as ``data``, when they are accessed. Pushes compare equal
+    when they have the same iden and modification time and sort by modification time, then by iden.
+    """
+
+    __slots__ = ("_account", "data")
+
+    iden = _field("iden")
+    type = _field("type")
+    active = _field("active")
+    dismissed = _field("dismissed")
+    created = _field("created")
+    modified = _field("modified")
+    direction = _field("direction")
+    guid = _field("guid")
+    title = _field("title")
+    body = _field("body")
+    url = _field("url")
+    file_name = _field("file_name")
+    file_type = _field("file_type")
+    file_url = _field("file_url")
+    image_url = _field("image_url")
+    target_device_iden = _field("target_device_iden")
+    source_device_iden = _field("source_device_iden")
+    sender_email = _field("sender_email")
+    receiver_email = _field("receiver_email")
+    channel_iden = _field("channel_iden")
+
+    def __init__(self, account, push_info):
+        self._account = account
+        self.data = push_info
+
+    @property
+    def target_device(self):
+        """The Device the push was sent to, ``None`` if it was sent to all devices or the device is unknown."""
+        return self._resolve(self._account.get_device_by_iden, self.target_device_iden)
+
+    @property
+    def source_device(self):
+        """The Device the push was sent from, ``None`` if unknown."""
+        return self._resolve(self._account.get_device_by_iden, self.source_device_iden)
+
+    @property
+    def chat(self):
+        """The Chat with the other party of the push, ``None`` if it wasn't exchanged with a known contact."""
+        email = self.receiver_email if self.direction == "outgoing" else self.sender_email
+        return self._resolve(self._account.get_chat, email)
+
+    @staticmethod
+    def _resolve(lookup, key):
+        if key is None:
+            return None
+        try:
+            return lookup(key)
+        except PushbulletError:
+            return None
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __eq__(self, other):
+        if not isinstance(other, Push):
+            return NotImplemented
+        return self.iden == other.iden and self.modified == other.modified
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __lt__(self, other):
+        if not isinstance(other, Push):
+            return NotImplemented
+        # Pushes modified at the same time are ordered by iden, so only equal pushes are neither smaller nor larger
+        return (self.modified or 0, self.iden or "") < (other.modified or 0, other.iden or "")
+
+    def __hash__(self):
+        return hash((self.iden, self.modified))
+
+    @use_appropriate_encoding
+    def __str__(self):
+        return "Push('{0}' iden: {1})".format(self.title or self.type, self.iden)
+
+    def __repr__(self):
+        return self.__str__()
@@ -1,15 +1,36 @@
 import json
-import os
+import uuid
+from collections import OrderedDict
+from functools import partial
 
 import requests
-from requests import ConnectionError
+from requests import ConnectionError, Timeout
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
 
-from ._compat import standard_b64encode
 from .channel import Channel
 from .chat import Chat
+from .crypto import EncryptionEngine, cached_key, derive_key, require_cryptography
 from .device import Device
-from .errors import InvalidKeyError, NoEncryptionModuleError, PushbulletError, PushError
-from .filetype import get_file_type
+from .errors import InvalidKeyError, PushbulletError, PushError
+from .filetype import sniff_file_type
+from .helpers import map_concurrently
+from .pagination import PageIterator
+from .push import Push
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
+from .upload import MultipartFileStream, content_key
+
+
+def _no_auth(request):
+    # Keeps the session's credentials from being sent along to third party hosts
+    return request
+
+
+def _unindex(index, value, obj):
+    found = index[value]
+    found.remove(obj)
+    if not found:
+        del index[value]
 
 
 class Pushbullet(object):
@@ -22,41 +43,264 @@ class Pushbullet(object):
     UPLOAD_REQUEST_URL = "https://api.pushbullet.com/v2/upload-request"
     EPHEMERALS_URL = "https://api.pushbullet.com/v2/ephemerals"
 
-    def __init__(self, api_key, encryption_password=None, proxy=None):
+    # name -> (list url, model, attribute holding the iden)
+    _COLLECTIONS = {
+        "devices": (DEVICES_URL, Device, "device_iden"),
+        "chats": (CHATS_URL, Chat, "iden"),
+        "channels": (CHANNELS_URL, Channel, "iden"),
+    }
+
+    # name -> ((index key, model attribute), ...)
+    _INDEXES = {
+        "devices": (("iden", "device_iden"), ("nickname", "nickname")),
+        "chats": (("iden", "iden"), ("email", "email")),
+        "channels": (("iden", "iden"), ("tag", "channel_tag")),
+    }
+
+    _page_iterator = PageIterator
+
+    def __init__(
+        self,
+        api_key,
+        encryption_password=None,
+        proxy=None,
+        lazy=False,
+        page_size=None,
+        session=None,
+        adapter=None,
+        pool_connections=None,
+        pool_maxsize=None,
+        keep_alive=True,
+        rate_limiter=None,
+        retry=None,
+        upload_cache=None,
+        encryption_key=None,
+        key_cache=None,
+    ):
+        """
+        :param api_key: Pushbullet access token
+        :param encryption_password: Password used for end-to-end encryption
+        :param proxy: Dictionary of HTTPS proxies, as accepted by requests
+        :param lazy: Don't load devices, chats, channels and user info up front, fetch each of them on first access
+            instead
+        :param page_size: Number of objects requested per page when loading devices, chats and channels
+        :param session: requests.Session to use instead of creating a new one, e.g. to share connections between
+            clients of different accounts. It is used as is, the API key is sent with every request instead of being
+            set on the session
+        :param adapter: requests transport adapter mounted for HTTPS requests on the session created by the client,
+            can be shared between clients. Ignored when ``session`` is given
+        :param pool_connections: Number of per-host connection pools to keep, ignored when ``adapter`` or ``session``
+            is given
+        :param pool_maxsize: Maximum number of connections kept per host, ignored when ``adapter`` or ``session`` is
+            given
+        :param keep_alive: Reuse connections between requests
+        :param rate_limiter: RateLimiter pacing the requests of this client, can be shared between clients of the
+            same account. A new one is created if not given, its current budget is exposed as ``rate_limiter.status``
+        :param retry: RetryPolicy applied to all requests, failed requests are not retried if not given
+        :param upload_cache: Cache, e.g. a MemoryCache or FileCache, remembering uploaded files by their contents so
+            uploading the same file again returns the earlier upload instead
+        :param encryption_key: End-to-end encryption key derived earlier, e.g. from ``pb.encryption.key``, used
+            instead of deriving it from ``encryption_password``
+        :param key_cache: Cache, e.g. a FileCache, keeping the keys derived from ``encryption_password`` so they
+            aren't derived again by the next client
+        """
         self.api_key = api_key
+        self.page_size = page_size
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.retry = retry or RetryPolicy(max_attempts=1)
+        self.upload_cache = upload_cache
+        self.key_cache = key_cache
         self._json_header = {"Content-Type": "application/json"}
 
-        self._session = requests.Session()
-        self._session.auth = (self.api_key, "")
-        self._session.headers.update(self._json_header)
-
-        if proxy:
-            if "https" not in [k.lower() for k in proxy.keys()]:
-                raise ConnectionError("You can only use HTTPS proxies!")
-            self._session.proxies.update(proxy)
-
-        self.refresh()
-
-        self._encryption_key = None
-        if encryption_password:
-            try:
-                from cryptography.hazmat.backends import default_backend
-                from cryptography.hazmat.primitives import hashes
-                from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-            except ImportError as e:
-                raise NoEncryptionModuleError(str(e))
-
-            kdf = PBKDF2HMAC(
-                algorithm=hashes.SHA256(),
-                length=32,
-                salt=self.user_info["iden"].encode("ASCII"),
-                iterations=30000,
-                backend=default_backend(),
+        self._devices = None
+        self._chats = None
+        self._channels = None
+        self._user_info = None
+        self._watermarks = {}
+        self._indexes = {name: {key: {} for key, _ in keys} for name, keys in self._INDEXES.items()}
+
+        if proxy and "https" not in [k.lower() for k in proxy.keys()]:
+            raise ConnectionError("You can only use HTTPS proxies!")
+
+        self._session = self._configure_session(session, adapter, pool_connections, pool_maxsize, keep_alive, proxy)
+        # Sent with every request rather than set on the session, which may be shared with other clients
+        self._auth = (self.api_key, "")
+        self._headers = dict(self._json_header)
+        if not keep_alive:
+            self._headers["Connection"] = "close"
+        self._proxies = proxy
+
+        if not lazy:
+            self.refresh()
+
+        self._encryption_key = encryption_key
+        if encryption_password and not encryption_key:
+            self._encryption_key = self._derive_key(encryption_password)
+
+    def _configure_session(self, session, adapter, pool_connections, pool_maxsize, keep_alive, proxy):
+        if session is not None:
+            return session
+
+        session = requests.Session()
+        if adapter is None and (pool_connections or pool_maxsize):
+            adapter = HTTPAdapter(
+                pool_connections=pool_connections or DEFAULT_POOLSIZE, pool_maxsize=pool_maxsize or DEFAULT_POOLSIZE
             )
-            self._encryption_key = kdf.derive(encryption_password.encode("UTF-8"))
+        if adapter is not None:
+            session.mount("https://", adapter)
+        return session
+
+    def _derive_key(self, encryption_password):
+        # Checked first so a missing cryptography package fails before the user info is requested for the salt
+        require_cryptography()
+        if self.key_cache is not None:
+            return cached_key(self.key_cache, encryption_password, self.user_info["iden"])
+        return derive_key(encryption_password, self.user_info["iden"])
+
+    @property
+    def _encryption_key(self):
+        return self._key
+
+    @_encryption_key.setter
+    def _encryption_key(self, key):
+        self._key = key
+        self._encryption = None
+
+    @property
+    def encryption(self):
+        """The EncryptionEngine for the end-to-end encryption key of the client, ``None`` without a key."""
+        if self._encryption is None and self._key:
+            self._encryption = EncryptionEngine(self._key)
+        return self._encryption
+
+    @property
+    def devices(self):
+        if self._devices is None:
+            self._load_devices()
+        return self._devices
+
+    @devices.setter
+    def devices(self, devices):
+        self._devices = devices
+        self._reindex("devices")
+
+    @property
+    def chats(self):
+        if self._chats is None:
+            self._load_chats()
+        return self._chats
+
+    @chats.setter
+    def chats(self, chats):
+        self._chats = chats
+        self._reindex("chats")
+
+    @property
+    def channels(self):
+        if self._channels is None:
+            self._load_channels()
+        return self._channels
+
+    @channels.setter
+    def channels(self, channels):
+        self._channels = channels
+        self._reindex("channels")
+
+    def _reindex(self, name):
+        objects = getattr(self, "_" + name) or []
+        indexes = {}
+        for key, attr in self._INDEXES[name]:
+            # Every value maps to the objects having it in list order, the first one is found like a linear search would
+            index = indexes[key] = {}
+            for obj in objects:
+                index.setdefault(getattr(obj, attr), []).append(obj)
+        # Swapped in once complete, lookups from other threads (e.g. a listener reloading devices) never see them empty
+        self._indexes[name] = indexes
+
+    def _lookup(self, name, key, value):
+        getattr(self, name)  # load the collection if needed
+        found = self._indexes[name][key].get(value)
+        return found[0] if found else None
+
+    def _add_object(self, name, obj):
+        getattr(self, name).append(obj)
+        for key, attr in self._INDEXES[name]:
+            self._indexes[name][key].setdefault(getattr(obj, attr), []).append(obj)
+
+    def _replace_object(self, name, old, new):
+        objects = getattr(self, name)
+        objects[objects.index(old)] = new
+        for key, attr in self._INDEXES[name]:
+            index = self._indexes[name][key]
+            old_value, new_value = getattr(old, attr), getattr(new, attr)
+            if old_value == new_value:
+                found = index[old_value]
+                found[found.index(old)] = new
+                continue
+            _unindex(index, old_value, old)
+            if new_value in index:
+                # Other objects have the new value, only the list tells where the new object goes between them
+                self._reindex(name)
+                return
+            index[new_value] = [new]
+
+    def _remove_object(self, name, obj):
+        getattr(self, name).remove(obj)
+        for key, attr in self._INDEXES[name]:
+            _unindex(self._indexes[name][key], getattr(obj, attr), obj)
+
+    @property
+    def user_info(self):
+        if self._user_info is None:
+            self._load_user_info()
+        return self._user_info
+
+    @user_info.setter
+    def user_info(self, user_info):
+        self._user_info = user_info
+
+    def _request(self, method, url, idempotent=None, paced=True, **kwargs):
+        """
+        Send a request through the session, pacing it with the rate limiter and retrying it as the retry policy
+        allows. GET and DELETE requests are idempotent unless told otherwise. Requests to other hosts than the API
+        are sent with ``paced=False``, they don't count against its rate limit.
+        """
+        if idempotent is None:
+            idempotent = method in ("get", "delete")
+        kwargs.setdefault("auth", self._auth)
+        kwargs["headers"] = dict(self._headers, **kwargs.get("headers", {}))
+        if self._proxies:
+            kwargs.setdefault("proxies", self._proxies)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            if attempt > 1 and hasattr(kwargs.get("data"), "seek"):
+                kwargs["data"].seek(0)
+            if paced:
+                self.rate_limiter.acquire()
+            try:
+                resp = getattr(self._session, method)(url, **kwargs)
+            except (ConnectionError, Timeout):
+                if not self.retry.should_retry(attempt, idempotent=idempotent):
+                    raise
+                self.retry.wait(attempt)
+                continue
+
+            if paced:
+                self.rate_limiter.update(resp.headers)
+            if resp.status_code == requests.codes.ok:
+                return resp
+            if not self.retry.should_retry(attempt, resp.status_code, idempotent):
+                return resp
+            self.retry.wait(attempt, resp.headers)
+
+    def _get_data(self, url, params=None):
+        resp = self._request("get", url, params=params)
+        return self._check_data_response(resp)
 
-    def _get_data(self, url):
-        resp = self._session.get(url)
+    @staticmethod
+    def _check_data_response(resp):
         if resp.status_code in (401, 403):
             raise InvalidKeyError()
         elif resp.status_code == 429:
@@ -66,38 +310,73 @@ class Pushbullet(object):
 
         return resp.json()
 
-    def _load_devices(self):
-        self.devices = []
-        resp_dict = self._get_data(self.DEVICES_URL)
-        device_list = resp_dict.get("devices", [])
+    def _fetch_collection(self, name, modified_after=None):
+        url = self._COLLECTIONS[name][0]
+        params = None
+        if modified_after is not None:
+            params = {"modified_after": modified_after}
+
+        return self._page_iterator(self, url, name, params, page_size=self.page_size)
+
+    def _build_collection(self, name, items, incremental=False):
+        """
+        Turn the objects in ``items`` into models as they are fetched, merging them into the current list when
+        ``incremental`` is set. Returns the new list and the newest modification time seen.
+        """
+        _, model, iden_attr = self._COLLECTIONS[name]
+        watermark = self._watermarks.get(name, 0) if incremental else 0
+
+        if incremental:
+            # Changed objects replace the ones we have, deleted ones come back with active set to false
+            merged = OrderedDict((getattr(obj, iden_attr), obj) for obj in getattr(self, "_" + name))
+            for info in items:
+                watermark = max(watermark, info.get("modified") or 0)
+                if info.get("active"):
+                    merged[info.get("iden")] = model(self, info)
+                else:
+                    merged.pop(info.get("iden"), None)
+            objects = list(merged.values())
+        else:
+            objects = []
+            for info in items:
+                watermark = max(watermark, info.get("modified") or 0)
+                if info.get("active"):
+                    objects.append(model(self, info))
 
-        for device_info in device_list:
-            if device_info.get("active"):
-                d = Device(self, device_info)
-                self.devices.append(d)
+        return objects, watermark
 
-    def _load_chats(self):
-        self.chats = []
-        resp_dict = self._get_data(self.CHATS_URL)
-        chat_list = resp_dict.get("chats", [])
+    def _apply_collection(self, name, objects, watermark):
+        self._watermarks[name] = watermark
+        setattr(self, name, objects)
 
-        for chat_info in chat_list:
-            if chat_info.get("active"):
-                c = Chat(self, chat_info)
-                self.chats.append(c)
+    def _sync_watermark(self, name):
+        # Only sync incrementally once the complete list has been loaded
+        if getattr(self, "_" + name) is None:
+            return None
+        return self._watermarks.get(name)
 
-    def _load_user_info(self):
-        self.user_info = self._get_data(self.ME_URL)
+    def _sync_collection(self, name, modified_after=None):
+        items = self._fetch_collection(name, modified_after)
+        return self._build_collection(name, items, incremental=modified_after is not None)
+
+    def _load_collection(self, name, incremental=False):
+        modified_after = self._sync_watermark(name) if incremental else None
+        self._apply_collection(name, *self._sync_collection(name, modified_after))
+
+    def _fetch_user_info(self):
+        return self._get_data(self.ME_URL)
 
-    def _load_channels(self):
-        self.channels = []
-        resp_dict = self._get_data(self.CHANNELS_URL)
-        channel_list = resp_dict.get("channels", [])
+    def _load_devices(self, incremental=False):
+        self._load_collection("devices", incremental)
 
-        for channel_info in channel_list:
-            if channel_info.get("active"):
-                c = Channel(self, channel_info)
-                self.channels.append(c)
+    def _load_chats(self, incremental=False):
+        self._load_collection("chats", incremental)
+
+    def _load_user_info(self):
+        self.user_info = self._fetch_user_info()
+
+    def _load_channels(self, incremental=False):
+        self._load_collection("channels", incremental)
 
     @staticmethod
     def _recipient(device=None, source=None, chat=None, email=None, channel=None):
@@ -119,20 +398,20 @@ class Pushbullet(object):
     def new_device(self, nickname, manufacturer=None, model=None, icon="system"):
         data = {"nickname": nickname, "icon": icon}
         data.update({k: v for k, v in (("model", model), ("manufacturer", manufacturer)) if v is not None})
-        r = self._session.post(self.DEVICES_URL, data=json.dumps(data))
+        r = self._request("post", self.DEVICES_URL, data=json.dumps(data))
         if r.status_code == requests.codes.ok:
             new_device = Device(self, r.json())
-            self.devices.append(new_device)
+            self._add_object("devices", new_device)
             return new_device
         else:
             raise PushbulletError(r.text)
 
     def new_chat(self, name, email):
         data = {"name": name, "email": email}
-        r = self._session.post(self.CHATS_URL, data=json.dumps(data))
+        r = self._request("post", self.CHATS_URL, data=json.dumps(data))
         if r.status_code == requests.codes.ok:
             new_chat = Chat(self, r.json())
-            self.chats.append(new_chat)
+            self._add_object("chats", new_chat)
             return new_chat
         else:
             raise PushbulletError(r.text)
@@ -149,10 +428,10 @@ class Pushbullet(object):
             if v is not None
         }
         iden = device.device_iden
-        r = self._session.post("{}/{}".format(self.DEVICES_URL, iden), data=json.dumps(data))
+        r = self._request("post", "{}/{}".format(self.DEVICES_URL, iden), idempotent=True, data=json.dumps(data))
         if r.status_code == requests.codes.ok:
             new_device = Device(self, r.json())
-            self.devices[self.devices.index(device)] = new_device
+            self._replace_object("devices", device, new_device)
             return new_device
         else:
             raise PushbulletError(r.text)
@@ -162,98 +441,175 @@ class Pushbullet(object):
         if muted is not None:
             data["muted"] = muted
         iden = chat.iden
-        r = self._session.post("{}/{}".format(self.CHATS_URL, iden), data=json.dumps(data))
+        r = self._request("post", "{}/{}".format(self.CHATS_URL, iden), idempotent=True, data=json.dumps(data))
         if r.status_code == requests.codes.ok:
             new_chat = Chat(self, r.json())
-            self.chats[self.chats.index(chat)] = new_chat
+            self._replace_object("chats", chat, new_chat)
             return new_chat
         else:
             raise PushbulletError(r.text)
 
     def remove_device(self, device):
         iden = device.device_iden
-        r = self._session.delete("{}/{}".format(self.DEVICES_URL, iden))
+        r = self._request("delete", "{}/{}".format(self.DEVICES_URL, iden))
         if r.status_code == requests.codes.ok:
-            self.devices.remove(device)
+            self._remove_object("devices", device)
         else:
             raise PushbulletError(r.text)
 
     def remove_chat(self, chat):
         iden = chat.iden
-        r = self._session.delete("{}/{}".format(self.CHATS_URL, iden))
+        r = self._request("delete", "{}/{}".format(self.CHATS_URL, iden))
         if r.status_code == requests.codes.ok:
-            self.chats.remove(chat)
+            self._remove_object("chats", chat)
             return True
         else:
             raise PushbulletError(r.text)
 
     def get_device(self, nickname):
-        req_device = next((device for device in self.devices if device.nickname == nickname), None)
+        req_device = self._lookup("devices", "nickname", nickname)
         if req_device is None:
             raise PushbulletError('No device found with nickname "{}"'.format(nickname))
 
         return req_device
 
+    def get_device_by_iden(self, iden):
+        req_device = self._lookup("devices", "iden", iden)
+        if req_device is None:
+            raise PushbulletError('No device found with iden "{}"'.format(iden))
+
+        return req_device
+
+    def get_chat(self, email):
+        req_chat = self._lookup("chats", "email", email)
+        if req_chat is None:
+            raise PushbulletError('No chat found with email "{}"'.format(email))
+
+        return req_chat
+
     def get_channel(self, channel_tag):
-        req_channel = next((channel for channel in self.channels if channel.channel_tag == channel_tag), None)
+        req_channel = self._lookup("channels", "tag", channel_tag)
         if req_channel is None:
             raise PushbulletError('No channel found with channel_tag "{}"'.format(channel_tag))
 
         return req_channel
 
-    def get_pushes(self, modified_after=None, limit=None, filter_inactive=True):
-        data = {"modified_after": modified_after, "limit": limit}
+    def iter_pushes(
+        self,
+        modified_after=None,
+        limit=None,
+        filter_inactive=True,
+        page_size=None,
+        cursor=None,
+        as_objects=False,
+        offset=0,
+    ):
+        """
+        Iterate over the pushes of the account, newest first, requesting pages as they are consumed.
+
+        :param modified_after: Only return pushes modified after this timestamp
+        :param limit: Stop after this many pushes
+        :param filter_inactive: Skip deleted pushes
+        :param page_size: Number of pushes requested per page, defaults to ``limit``
+        :param cursor: Cursor to continue from, as found on the ``cursor`` attribute of the returned iterator
+        :param as_objects: Yield :class:`Push` objects instead of dictionaries
+        :param offset: Number of pushes of the first page to skip, as found on the ``offset`` attribute of the returned
+            iterator
+        :return: A :class:`PageIterator` yielding the pushes
+        """
+        params = {"modified_after": modified_after, "limit": page_size or limit}
         if filter_inactive:
-            data["active"] = "true"
+            params["active"] = "true"
 
-        pushes_list = []
-        get_more_pushes = True
-        while get_more_pushes:
-            r = self._session.get(self.PUSH_URL, params=data)
-            if r.status_code != requests.codes.ok:
-                raise PushbulletError(r.text)
+        model = Push if as_objects else None
+        return self._page_iterator(
+            self, self.PUSH_URL, "pushes", params, limit=limit, cursor=cursor, offset=offset, model=model
+        )
 
-            pushes_list += r.json().get("pushes")
-            if "cursor" in r.json() and (not limit or len(pushes_list) < limit):
-                data["cursor"] = r.json()["cursor"]
-            else:
-                get_more_pushes = False
-
-        return pushes_list
+    def get_pushes(self, modified_after=None, limit=None, filter_inactive=True, as_objects=False):
+        return list(self.iter_pushes(modified_after, limit, filter_inactive, as_objects=as_objects))
 
     def dismiss_push(self, iden):
         data = {"dismissed": True}
-        r = self._session.post("{}/{}".format(self.PUSH_URL, iden), data=json.dumps(data))
+        r = self._request("post", "{}/{}".format(self.PUSH_URL, iden), idempotent=True, data=json.dumps(data))
         if r.status_code != requests.codes.ok:
             raise PushbulletError(r.text)
 
     def delete_push(self, iden):
-        r = self._session.delete("{}/{}".format(self.PUSH_URL, iden))
+        r = self._request("delete", "{}/{}".format(self.PUSH_URL, iden))
         if r.status_code != requests.codes.ok:
             raise PushbulletError(r.text)
 
     def delete_pushes(self):
-        r = self._session.delete(self.PUSH_URL)
+        r = self._request("delete", self.PUSH_URL)
         if r.status_code != requests.codes.ok:
             raise PushbulletError(r.text)
 
-    def upload_file(self, f, file_name, file_type=None):
+    def upload_file(self, f, file_name, file_type=None, progress=None):
+        """
+        Upload a file so it can be pushed with :meth:`push_file`. The file is streamed from its current position
+        rather than read into memory.
+
+        :param f: File object opened in binary mode
+        :param file_name: Name of the file
+        :param file_type: MIME type of the file, detected from its contents or name if not given
+        :param progress: Function called with the number of bytes sent so far and the total size of the upload
+        :return: A dictionary with ``file_type``, ``file_url`` and ``file_name`` keys
+        """
         if not file_type:
-            file_type = get_file_type(f, file_name)
+            file_type, f = sniff_file_type(f, file_name)
+
+        cache_key = self._upload_cache_key(f, file_name, file_type)
+        if cache_key is not None:
+            cached = self.upload_cache.get(cache_key)
+            if cached is not None:
+                return cached
 
         data = {"file_name": file_name, "file_type": file_type}
 
-        r = self._session.post(self.UPLOAD_REQUEST_URL, data=json.dumps(data))
+        r = self._request("post", self.UPLOAD_REQUEST_URL, idempotent=True, data=json.dumps(data))
         if r.status_code != requests.codes.ok:
             raise PushbulletError(r.text)
 
-        upload_data = r.json().get("data")
-        file_url = r.json().get("file_url")
-        upload_url = r.json().get("upload_url")
-
-        requests.post(upload_url, data=upload_data, files={"file": f})
+        upload_request = r.json()
+        body = MultipartFileStream(upload_request.get("data"), f, file_name, file_type, progress)
+
+        r = self._request(
+            "post",
+            upload_request.get("upload_url"),
+            idempotent=True,
+            data=body,
+            headers={"Content-Type": body.content_type},
+            auth=_no_auth,
+            paced=False,
+        )
+        if not 200 <= r.status_code < 300:
+            raise PushbulletError(r.text)
 
-        return {"file_type": file_type, "file_url": file_url, "file_name": file_name}
+        uploaded = {"file_type": file_type, "file_url": upload_request.get("file_url"), "file_name": file_name}
+        if cache_key is not None:
+            self.upload_cache.set(cache_key, uploaded)
+        return uploaded
+
+    def _upload_cache_key(self, f, file_name, file_type):
+        if self.upload_cache is None:
+            return None
+        return content_key(f, file_name, file_type)
+
+    def upload_files(self, files, concurrency=4):
+        """
+        Upload many files concurrently.
+
+        :param files: ``(f, file_name)`` or ``(f, file_name, file_type)`` tuples, like the arguments of
+            :meth:`upload_file`
+        :param concurrency: Number of files uploaded at the same time
+        :return: A list of ``(file, result, exception)`` tuples in the order of ``files``, where ``result`` is what
+            :meth:`upload_file` returns for the file. ``exception`` is ``None`` for successful uploads and
+            ``result`` for failed ones
+        """
+        files = [tuple(file) for file in files]
+        results = map_concurrently(lambda file: self.upload_file(*file), files, concurrency=concurrency)
+        return [(file, result, error) for file, (result, error) in zip(files, results)]
 
     def push_file(self, file_name, file_url, file_type, body=None, title=None, device=None, source=None, chat=None, email=None, channel=None):
         data = {"type": "file", "file_type": file_type,
@@ -279,8 +635,48 @@ class Pushbullet(object):
         data.update(Pushbullet._recipient(device, source, chat, email, channel))
         return self._push(data)
 
+    def push_many(self, payload, targets, concurrency=10):
+        """
+        Send the same push to many targets concurrently.
+
+        :param payload: Push data without recipient, e.g. ``{"type": "note", "title": "title", "body": "body"}``
+        :param targets: Devices, chats, channels or email addresses to push to
+        :param concurrency: Number of pushes sent at the same time
+        :return: A list of ``(target, response, exception)`` tuples in the order of ``targets``, ``exception`` is
+            ``None`` for successful pushes and ``response`` for failed ones
+        """
+        targets = list(targets)
+        results = map_concurrently(
+            lambda target: self._push(self._target_data(payload, target)), targets, concurrency=concurrency
+        )
+        return [(target, response, error) for target, (response, error) in zip(targets, results)]
+
+    @staticmethod
+    def _target_data(payload, target):
+        data = dict(payload)
+        # Chats are devices too, so they need to be checked first
+        if isinstance(target, Chat):
+            data.update(Pushbullet._recipient(chat=target))
+        elif isinstance(target, Device):
+            data.update(Pushbullet._recipient(device=target))
+        elif isinstance(target, Channel):
+            data.update(Pushbullet._recipient(channel=target))
+        else:
+            data.update(Pushbullet._recipient(email=target))
+        return data
+
     def _push(self, data):
-        r = self._session.post(self.PUSH_URL, data=json.dumps(data))
+        r = self._request("post", self.PUSH_URL, **self._push_request_args(data))
+        return self._check_push_response(r)
+
+    def _push_request_args(self, data):
+        if self.retry.enabled and "guid" not in data:
+            # The API returns the already created push when a push with the same guid is sent again
+            data["guid"] = uuid.uuid4().hex
+        return {"idempotent": "guid" in data, "data": json.dumps(data)}
+
+    @staticmethod
+    def _check_push_response(r):
         if r.status_code == requests.codes.ok:
             js = r.json()
             rate_limit = {}
@@ -294,6 +690,12 @@ class Pushbullet(object):
             raise PushError(r.text)
 
     def push_sms(self, device, number, message):
+        r = self._request("post", self.EPHEMERALS_URL, data=json.dumps(self._sms_data(device, number, message)))
+        if r.status_code == requests.codes.ok:
+            return r.json()
+        raise PushError(r.text)
+
+    def _sms_data(self, device, number, message):
         data = {
             "type": "push",
             "push": {
@@ -309,53 +711,42 @@ class Pushbullet(object):
         if self._encryption_key:
             data["push"] = {"ciphertext": self._encrypt_data(data["push"]), "encrypted": True}
 
-        r = self._session.post(self.EPHEMERALS_URL, data=json.dumps(data))
-        if r.status_code == requests.codes.ok:
-            return r.json()
-        raise PushError(r.text)
+        return data
 
     def _encrypt_data(self, data):
         assert self._encryption_key
-
-        from cryptography.hazmat.backends import default_backend
-        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-
-        iv = os.urandom(12)
-        encryptor = Cipher(algorithms.AES(self._encryption_key), modes.GCM(iv), backend=default_backend()).encryptor()
-
-        ciphertext = encryptor.update(json.dumps(data).encode("UTF-8")) + encryptor.finalize()
-        ciphertext = b"1" + encryptor.tag + iv + ciphertext
-        return standard_b64encode(ciphertext).decode("ASCII")
+        return self.encryption.encrypt(json.dumps(data))
 
     def _decrypt_data(self, data):
         assert self._encryption_key
-
-        from binascii import a2b_base64
-
-        from cryptography.hazmat.backends import default_backend
-        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-
-        key = self._encryption_key
-        encoded_message = a2b_base64(data)
-
-        version = encoded_message[0:1]
-        tag = encoded_message[1:17]
-        initialization_vector = encoded_message[17:29]
-        encrypted_message = encoded_message[29:]
-
-        if version != b"1":
-            raise Exception("Invalid Version")
-
-        cipher = Cipher(algorithms.AES(key), modes.GCM(initialization_vector, tag), backend=default_backend())
-        decryptor = cipher.decryptor()
-
-        decrypted = decryptor.update(encrypted_message) + decryptor.finalize()
-        decrypted = decrypted.decode()
-
-        return decrypted
-
-    def refresh(self):
-        self._load_devices()
-        self._load_chats()
-        self._load_user_info()
-        self._load_channels()
+        return self.encryption.decrypt(data)
+
+    def refresh(self, parallel=False, incremental=False):
+        """
+        Reload the devices, chats, user info and channels of the account.
+
+        :param parallel: Issue the four requests concurrently. The results are only applied once all of them
+            succeeded, otherwise the first error is raised and the current state is kept.
+        :param incremental: Only fetch the devices, chats and channels modified since the last refresh and merge
+            them into the current lists.
+        """
+        if not parallel:
+            self._load_devices(incremental)
+            self._load_chats(incremental)
+            self._load_user_info()
+            self._load_channels(incremental)
+            return
+
+        names = ("devices", "chats", "channels")
+        watermarks = [self._sync_watermark(name) if incremental else None for name in names]
+        fetchers = [partial(self._sync_collection, name, watermark) for name, watermark in zip(names, watermarks)]
+        fetchers.append(self._fetch_user_info)
+
+        results = map_concurrently(lambda fetch: fetch(), fetchers)
+        for _, error in results:
+            if error is not None:
+                raise error
+
+        for name, (collection, _) in zip(names, results):
+            self._apply_collection(name, *collection)
+        self.user_info = results[-1][0]
@@ -0,0 +1,80 @@
+import threading
+import time
+
+from .helpers import header_number
+
+
+class RateLimiter(object):
+    """
+    Tracks the rate limit budget reported in the ``X-Ratelimit-*`` headers of the API responses and paces requests
+    so the remaining budget lasts until it is reset.
+
+    Requests are paced like a token bucket: tokens are refilled at the rate that spends the remaining budget evenly
+    over the rest of the rate limit window, and up to ``burst`` of them can be used at once. Nothing is paced until
+    the API reported a budget.
+    """
+
+    def __init__(self, burst=10, reserve=0):
+        """
+        :param burst: Number of requests that may be sent back to back
+        :param reserve: Part of the budget that is never used
+        """
+        self.burst = burst
+        self.reserve = reserve
+
+        self.limit = None
+        self.remaining = None
+        self.reset = None
+
+        self._tokens = burst
+        self._last_refill = time.time()
+        self._lock = threading.Lock()
+
+    def update(self, headers):
+        """Record the budget reported in the headers of a response."""
+        limit = header_number(headers, "X-Ratelimit-Limit")
+        remaining = header_number(headers, "X-Ratelimit-Remaining")
+        reset = header_number(headers, "X-Ratelimit-Reset")
+
+        with self._lock:
+            if limit is not None:
+                self.limit = limit
+            if remaining is not None:
+                self.remaining = remaining
+            if reset is not None:
+                self.reset = reset
+
+    def delay(self):
+        """Reserve a request and return the number of seconds to wait before sending it."""
+        with self._lock:
+            now = time.time()
+            if self.remaining is None or self.reset is None or now >= self.reset:
+                self._tokens = self.burst
+                self._last_refill = now
+                return 0
+
+            budget = self.remaining - self.reserve
+            if budget < 1:
+                return self.reset - now
+
+            rate = budget / (self.reset - now)
+            self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * rate)
+            self._last_refill = now
+
+            # Tokens go negative to hand out the next free slots to concurrent callers
+            self._tokens -= 1
+            self.remaining -= 1
+            if self._tokens >= 0:
+                return 0
+            return -self._tokens / rate
+
+    def acquire(self):
+        """Block until the next request may be sent."""
+        delay = self.delay()
+        if delay > 0:
+            time.sleep(delay)
+
+    @property
+    def status(self):
+        """The last reported budget as a dictionary with ``limit``, ``remaining`` and ``reset`` keys."""
+        return {"limit": self.limit, "remaining": self.remaining, "reset": self.reset}
@@ -0,0 +1,75 @@
+import random
+import time
+
+from .helpers import header_number
+
+
+def exponential_backoff(attempt, base=0.5, maximum=30.0, jitter=True):
+    """
+    Delay before the next try after ``attempt`` failed ones, doubling with every attempt up to ``maximum``.
+
+    With ``jitter`` a random delay between zero and that value is returned, so that clients failing at the same
+    time don't all come back at the same time.
+    """
+    delay = min(maximum, base * 2 ** max(attempt - 1, 0))
+    if jitter:
+        delay = random.uniform(0, delay)
+    return delay
+
+
+class RetryPolicy(object):
+    """
+    Decides whether a failed request is sent again and how long to wait before doing so.
+
+    Requests rejected with a ``429`` never reached the API, so they are always retried. Other retryable statuses
+    and connection errors are only retried for idempotent requests, as the original request may have been
+    processed.
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, max_attempts=3, backoff_base=0.5, backoff_max=30.0, jitter=True, statuses=RETRY_STATUSES):
+        """
+        :param max_attempts: Number of times a request is sent at most, 1 disables retries
+        :param backoff_base: Delay after the first failed attempt, doubled for every further one
+        :param backoff_max: Longest delay between two attempts, also caps delays requested by the server
+        :param jitter: Randomize delays
+        :param statuses: Response statuses that are retried
+        """
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.statuses = statuses
+
+    @property
+    def enabled(self):
+        return self.max_attempts > 1
+
+    def should_retry(self, attempt, status=None, idempotent=True):
+        """
+        :param attempt: Number of attempts made so far
+        :param status: Status of the last response, ``None`` if the request failed with a connection error
+        :param idempotent: Whether sending the request again has the same effect as sending it once
+        """
+        if attempt >= self.max_attempts:
+            return False
+        if status == 429:
+            return True
+        return idempotent and (status is None or status in self.statuses)
+
+    def delay(self, attempt, headers=None):
+        """Seconds to wait after ``attempt`` failed attempts, honoring ``Retry-After`` and ``X-Ratelimit-Reset``."""
+        if headers is not None:
+            retry_after = header_number(headers, "Retry-After")
+            if retry_after is None:
+                reset = header_number(headers, "X-Ratelimit-Reset")
+                if reset is not None and header_number(headers, "X-Ratelimit-Remaining") == 0:
+                    retry_after = reset - time.time()
+            if retry_after is not None:
+                return min(max(retry_after, 0), self.backoff_max)
+
+        return exponential_backoff(attempt, self.backoff_base, self.backoff_max, self.jitter)
+
+    def wait(self, attempt, headers=None):
+        time.sleep(self.delay(attempt, headers))
@@ -0,0 +1,149 @@
+import json
+import sqlite3
+import threading
+
+from .device import Device
+from .push import Push
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pushes (
+    iden TEXT PRIMARY KEY,
+    type TEXT,
+    dismissed INTEGER,
+    created REAL,
+    modified REAL,
+    target_device_iden TEXT,
+    source_device_iden TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pushes_created ON pushes (created);
+CREATE INDEX IF NOT EXISTS pushes_target_device ON pushes (target_device_iden, created);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value REAL
+);
+"""
+
+
+class PushStore(object):
+    """
+    A local copy of the pushes of an account, kept in a SQLite database.
+
+    :meth:`sync` only requests the pushes modified since the previous sync, stores new and changed ones and removes
+    deleted ones. :meth:`query` answers from the database without any request.
+    """
+
+    def __init__(self, account, path):
+        """
+        :param account: Pushbullet object
+        :param path: Path of the SQLite database file, created if it doesn't exist
+        """
+        self._account = account
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    @property
+    def watermark(self):
+        """Modification time of the newest push seen, ``None`` before the first sync."""
+        with self._lock:
+            row = self._db.execute("SELECT value FROM sync_state WHERE key = 'modified'").fetchone()
+        return row[0] if row else None
+
+    def sync(self, page_size=None):
+        """
+        Bring the store up to date. Changes are only committed once all of them have been fetched, so an
+        interrupted sync is started over the next time.
+
+        :param page_size: Number of pushes requested per page
+        :return: The number of pushes stored, changed or removed
+        """
+        with self._lock:
+            watermark = self.watermark
+            pushes = self._account.iter_pushes(modified_after=watermark, filter_inactive=False, page_size=page_size)
+
+            count = 0
+            with self._db:
+                for push in pushes:
+                    if push.get("active", True):
+                        self._db.execute(
+                            "INSERT OR REPLACE INTO pushes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            (
+                                push.get("iden"),
+                                push.get("type"),
+                                push.get("dismissed"),
+                                push.get("created"),
+                                push.get("modified"),
+                                push.get("target_device_iden"),
+                                push.get("source_device_iden"),
+                                json.dumps(push),
+                            ),
+                        )
+                    else:
+                        self._db.execute("DELETE FROM pushes WHERE iden = ?", (push.get("iden"),))
+                    watermark = max(watermark or 0, push.get("modified") or 0)
+                    count += 1
+
+                if watermark is not None:
+                    self._db.execute("INSERT OR REPLACE INTO sync_state VALUES ('modified', ?)", (watermark,))
+
+            return count
+
+    def query(self, device=None, type=None, since=None, until=None, dismissed=None, limit=None, as_objects=False):
+        """
+        Stored pushes matching all of the given filters, newest first.
+
+        :param device: Device (or device iden) the pushes were sent to
+        :param type: Push type, e.g. ``"note"``, ``"link"`` or ``"file"``
+        :param since: Only pushes created at or after this timestamp
+        :param until: Only pushes created before this timestamp
+        :param dismissed: Only dismissed (``True``) or not dismissed (``False``) pushes
+        :param limit: Return at most this many pushes
+        :param as_objects: Return :class:`Push` objects instead of dictionaries
+        """
+        conditions = []
+        params = []
+        if device is not None:
+            conditions.append("target_device_iden = ?")
+            params.append(device.device_iden if isinstance(device, Device) else device)
+        if type is not None:
+            conditions.append("type = ?")
+            params.append(type)
+        if since is not None:
+            conditions.append("created >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("created < ?")
+            params.append(until)
+        if dismissed is not None:
+            conditions.append("dismissed = ?")
+            params.append(bool(dismissed))
+
+        sql = "SELECT data FROM pushes"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY created DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+
+        pushes = [json.loads(data) for data, in rows]
+        if as_objects:
+            return [Push(self._account, push) for push in pushes]
+        return pushes
+
+    def get(self, iden):
+        """The stored push with the given iden, ``None`` if there is none."""
+        with self._lock:
+            row = self._db.execute("SELECT data FROM pushes WHERE iden = ?", (iden,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM pushes").fetchone()[0]
+
+    def close(self):
+        self._db.close()
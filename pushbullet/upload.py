@@ -0,0 +1,142 @@
+import hashlib
+import io
+import os
+import uuid
+
+
+def _file_size(f):
+    """Number of bytes left to read from ``f``, ``None`` if it can't be told without reading it."""
+    try:
+        return os.fstat(f.fileno()).st_size - f.tell()
+    except (AttributeError, OSError, IOError, ValueError, io.UnsupportedOperation):
+        pass
+    try:
+        position = f.tell()
+        f.seek(0, os.SEEK_END)
+        size = f.tell() - position
+        f.seek(position)
+        return size
+    except (AttributeError, OSError, IOError, ValueError, io.UnsupportedOperation):
+        return None
+
+
+def content_key(f, file_name, file_type):
+    """
+    Key identifying an upload by the contents of ``f`` from its current position, its name and its type. The file
+    is left at its position. ``None`` for files that can't be read twice.
+    """
+    try:
+        position = f.tell()
+    except (AttributeError, OSError, IOError, ValueError, io.UnsupportedOperation):
+        return None
+
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: f.read(MultipartFileStream.chunk_size), b""):
+        digest.update(chunk)
+    f.seek(position)
+
+    digest.update(b"\0" + file_name.encode("UTF-8") + b"\0" + (file_type or "").encode("UTF-8"))
+    return digest.hexdigest()
+
+
+class MultipartFileStream(object):
+    """
+    A ``multipart/form-data`` request body with one file field that reads the file while the body is sent instead
+    of loading it into memory.
+
+    Its length is known up front, so the body is sent with a ``Content-Length`` header rather than chunked. Files
+    whose size can't be determined are read into memory first.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, fields, f, file_name, file_type, progress=None):
+        """
+        :param fields: Form fields sent before the file
+        :param f: File object to send, read from its current position, or an iterator of bytes
+        :param file_name: Name of the file
+        :param file_type: MIME type of the file
+        :param progress: Function called with the number of bytes sent so far and the total size of the body
+        """
+        self.boundary = uuid.uuid4().hex
+        self.content_type = "multipart/form-data; boundary=" + self.boundary
+
+        head = []
+        for name, value in (fields or {}).items():
+            head.append(
+                '--{0}\r\nContent-Disposition: form-data; name="{1}"\r\n\r\n{2}\r\n'.format(self.boundary, name, value)
+            )
+        head.append(
+            '--{0}\r\nContent-Disposition: form-data; name="file"; filename="{1}"\r\nContent-Type: {2}\r\n\r\n'.format(
+                self.boundary, file_name, file_type or "application/octet-stream"
+            )
+        )
+        self._head = "".join(head).encode("UTF-8")
+        self._tail = "\r\n--{0}--\r\n".format(self.boundary).encode("UTF-8")
+
+        file_size = _file_size(f)
+        if file_size is None:
+            f = io.BytesIO(f.read() if hasattr(f, "read") else b"".join(f))
+            file_size = len(f.getvalue())
+
+        self._file = f
+        self._file_size = file_size
+        self._file_start = f.tell()
+        self._parts = (self._head, f, self._tail)
+        self.len = len(self._head) + file_size + len(self._tail)
+
+        self._progress = progress
+        self.seek(0)
+
+    def __len__(self):
+        return self.len
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        """Only rewinding to the start is supported, used when the request is sent again."""
+        if offset != 0 or whence != os.SEEK_SET:
+            raise io.UnsupportedOperation("MultipartFileStream can only be rewound")
+        self._file.seek(self._file_start)
+        self._part = 0
+        self._part_position = 0
+        self._position = 0
+
+    def read(self, size=-1):
+        chunks = []
+        while self._part < len(self._parts) and size != 0:
+            part = self._parts[self._part]
+            if isinstance(part, bytes):
+                start = self._part_position
+                end = len(part) if size < 0 else start + size
+                chunk = part[start:end]
+                self._part_position += len(chunk)
+                done = self._part_position >= len(part)
+            else:
+                # Bytes written to the file after the length was taken would not fit in the Content-Length
+                remaining = self._file_size - self._part_position
+                chunk = part.read(remaining if size < 0 else min(size, remaining)) if remaining else b""
+                self._part_position += len(chunk)
+                done = not chunk or self._part_position >= self._file_size
+
+            if chunk:
+                chunks.append(chunk)
+                if size > 0:
+                    size -= len(chunk)
+            if done:
+                self._part += 1
+                self._part_position = 0
+
+        data = b"".join(chunks)
+        self._position += len(data)
+        if data and self._progress is not None:
+            self._progress(self._position, self.len)
+        return data
@@ -3,3 +3,8 @@ def mock_refresh(self):
     self.devices = []
     self.chats = []
     self.channels = []
+
+
+# Sent with every request of a client created with the "apikey" key
+AUTH = ("apikey", "")
+HEADERS = {"Content-Type": "application/json"}
@@ -0,0 +1,462 @@
+import asyncio
+import io
+import json
+import threading
+import time
+
+import pytest
+
+from pushbullet.cache import MemoryCache
+from pushbullet.chat import Chat
+from pushbullet.device import Device
+from pushbullet.errors import PushbulletError, PushError
+from pushbullet.listener import CLOCK_SKEW
+from pushbullet.retry import RetryPolicy
+
+from .fixtures import channels_list_response, chats_list_response, devices_list_response
+
+aiohttp = pytest.importorskip("aiohttp")
+
+from pushbullet.aio import AsyncListener, AsyncPushbullet  # noqa: E402
+
+
+class FakeResponse(object):
+    def __init__(self, status, body=None, headers=None):
+        self.status = status
+        self.headers = headers or {}
+        self._body = body
+
+    async def text(self):
+        return json.dumps(self._body)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+class FakeSession(object):
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        response = self.responses[url] if isinstance(self.responses, dict) else self.responses.pop(0)
+        return response
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_refresh():
+    session = FakeSession(
+        {
+            AsyncPushbullet.DEVICES_URL: FakeResponse(200, devices_list_response),
+            AsyncPushbullet.CHATS_URL: FakeResponse(200, chats_list_response),
+            AsyncPushbullet.CHANNELS_URL: FakeResponse(200, channels_list_response),
+            AsyncPushbullet.ME_URL: FakeResponse(200, {"iden": "123"}),
+        }
+    )
+
+    async def main():
+        async with AsyncPushbullet("apikey", session=session) as pb:
+            return pb
+
+    pb = run(main())
+
+    assert len(session.calls) == 4
+    assert len(pb.devices) == 1
+    assert len(pb.chats) == 1
+    assert len(pb.channels) == 1
+    assert pb.user_info == {"iden": "123"}
+
+
+def test_collections_not_loaded():
+    pb = AsyncPushbullet("apikey", session=FakeSession([]))
+
+    with pytest.raises(PushbulletError):
+        pb.devices
+
+
+def test_push_note():
+    session = FakeSession([FakeResponse(200, {"iden": "push1"}, {"X-Ratelimit-Remaining": "1000"})])
+    pb = AsyncPushbullet("apikey", session=session)
+
+    push = run(pb.push_note("title", "body", email="test@example.com"))
+
+    assert push["iden"] == "push1"
+    assert push["rate_limit"]["remaining"] == "1000"
+    method, url, kwargs = session.calls[0]
+    assert (method, url) == ("post", pb.PUSH_URL)
+    assert json.loads(kwargs["data"]) == {"type": "note", "title": "title", "body": "body", "email": "test@example.com"}
+    assert kwargs["headers"]["Authorization"] == "Basic YXBpa2V5Og=="
+
+
+def test_device_push():
+    session = FakeSession([FakeResponse(200, {})])
+    pb = AsyncPushbullet("apikey", session=session)
+    device = Device(pb, {"iden": "123"})
+
+    run(device.push_note("title", "body"))
+
+    assert json.loads(session.calls[0][2]["data"])["device_iden"] == "123"
+
+
+def test_push_fail():
+    pb = AsyncPushbullet("apikey", session=FakeSession([FakeResponse(400, {})]))
+
+    with pytest.raises(PushError):
+        run(pb.push_note("title", "body"))
+
+
+def test_iter_pushes():
+    session = FakeSession(
+        [
+            FakeResponse(200, {"pushes": [{"iden": "1"}, {"iden": "2"}], "cursor": "cursor1"}),
+            FakeResponse(200, {"pushes": [{"iden": "3"}]}),
+        ]
+    )
+    pb = AsyncPushbullet("apikey", session=session)
+
+    async def main():
+        return [push["iden"] async for push in pb.iter_pushes(page_size=2)]
+
+    assert run(main()) == ["1", "2", "3"]
+    assert session.calls[0][2]["params"] == {"limit": 2, "active": "true"}
+    assert session.calls[1][2]["params"] == {"limit": 2, "active": "true", "cursor": "cursor1"}
+
+
+def test_get_pushes():
+    pb = AsyncPushbullet("apikey", session=FakeSession([FakeResponse(200, {"pushes": [{"iden": "1"}]})]))
+
+    assert run(pb.get_pushes()) == [{"iden": "1"}]
+
+
+def test_retry():
+    session = FakeSession([FakeResponse(503), FakeResponse(200, {"pushes": []})])
+    pb = AsyncPushbullet("apikey", session=session, retry=RetryPolicy(max_attempts=2, backoff_base=0))
+
+    assert run(pb.get_pushes()) == []
+    assert len(session.calls) == 2
+
+
+def test_remove_chat():
+    session = FakeSession([FakeResponse(200, {})])
+    pb = AsyncPushbullet("apikey", session=session)
+    pb.chats = [Chat(pb, {"iden": "c1", "with": {"email": "test@example.com"}})]
+
+    assert run(pb.remove_chat(pb.chats[0]))
+    assert pb.chats == []
+    assert session.calls[0][:2] == ("delete", pb.CHATS_URL + "/c1")
+
+
+def test_push_many():
+    session = FakeSession([FakeResponse(200, {}), FakeResponse(400, {})])
+    pb = AsyncPushbullet("apikey", session=session)
+
+    results = run(pb.push_many({"type": "note", "title": "title", "body": "body"}, ["a@example.com", "b@example.com"]))
+
+    assert [target for target, _, _ in results] == ["a@example.com", "b@example.com"]
+    assert results[0][2] is None
+    assert isinstance(results[1][2], PushError)
+
+
+def test_iter_pushes_needs_async_for():
+    pushes = AsyncPushbullet("apikey", session=FakeSession([])).iter_pushes()
+
+    with pytest.raises(TypeError):
+        next(pushes)
+    with pytest.raises(TypeError):
+        for push in pushes:
+            pass
+
+
+def test_upload_files():
+    pb = AsyncPushbullet("apikey", session=FakeSession([]))
+
+    async def upload(f, file_name, file_type=None):
+        if file_name == "fail.png":
+            raise PushbulletError("failed")
+        return {"file_type": file_type, "file_url": "url/" + file_name, "file_name": file_name}
+
+    pb.upload_file = upload
+    results = run(pb.upload_files([("f1", "one.png", "image/png"), ("f2", "fail.png")]))
+
+    assert results[0] == (
+        ("f1", "one.png", "image/png"),
+        {"file_type": "image/png", "file_url": "url/one.png", "file_name": "one.png"},
+        None,
+    )
+    assert results[1][1] is None
+    assert isinstance(results[1][2], PushbulletError)
+
+
+class FakeMessage(object):
+    def __init__(self, data, type=None):
+        self.data = data
+        self.type = type or aiohttp.WSMsgType.TEXT
+
+
+class FakeWebSocket(object):
+    def __init__(self, messages):
+        self.messages = list(messages)
+
+    async def __aenter__(self):
+        if isinstance(self.messages, Exception):
+            raise self.messages
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.messages:
+            raise StopAsyncIteration
+        return self.messages.pop(0)
+
+
+class FakeStreamSession(FakeSession):
+    def __init__(self, responses, connections):
+        super(FakeStreamSession, self).__init__(responses)
+        self.connections = connections
+        self.urls = []
+
+    def ws_connect(self, url, **kwargs):
+        self.urls.append(url)
+        connection = self.connections.pop(0)
+        if isinstance(connection, Exception):
+            raise connection
+        return FakeWebSocket(connection)
+
+
+def test_listener():
+    session = FakeStreamSession(
+        [],
+        [
+            [
+                FakeMessage('{"type": "nop"}'),
+                FakeMessage('{"type": "tickle", "subtype": "push"}'),
+                FakeMessage("", aiohttp.WSMsgType.PING),
+                FakeMessage('{"type": "push", "push": {"type": "mirror"}}'),
+            ]
+        ],
+    )
+    pb = AsyncPushbullet("apikey", session=session)
+
+    async def main():
+        return [event async for event in AsyncListener(pb, reconnect=False)]
+
+    events = run(main())
+
+    assert session.urls == ["wss://stream.pushbullet.com/websocket/apikey"]
+    assert events == [{"type": "tickle", "subtype": "push"}, {"type": "push", "push": {"type": "mirror"}}]
+
+
+def test_listener_reconnects_and_catches_up():
+    session = FakeStreamSession(
+        [FakeResponse(200, {"pushes": [{"iden": "new", "modified": 2.0}, {"iden": "old", "modified": 1.0}]})],
+        [
+            [FakeMessage('{"type": "tickle", "subtype": "push"}')],
+            aiohttp.ClientConnectionError("failed"),
+            [FakeMessage('{"type": "tickle", "subtype": "device"}')],
+            [],
+        ],
+    )
+    pb = AsyncPushbullet("apikey", session=session)
+
+    async def main():
+        events = []
+        async with AsyncListener(pb, reconnect_delay=0) as listener:
+            async for event in listener:
+                events.append(event)
+                if len(events) == 4:
+                    break
+        return events
+
+    events = run(main())
+
+    assert events == [
+        {"type": "tickle", "subtype": "push"},
+        {"type": "sync", "subtype": "push", "push": {"iden": "old", "modified": 1.0}},
+        {"type": "sync", "subtype": "push", "push": {"iden": "new", "modified": 2.0}},
+        {"type": "tickle", "subtype": "device"},
+    ]
+    assert session.calls[0][2]["params"]["modified_after"] < time.time() - CLOCK_SKEW
+
+
+def test_listener_raises_connection_errors_without_reconnect():
+    session = FakeStreamSession([], [aiohttp.ClientConnectionError("failed")])
+    pb = AsyncPushbullet("apikey", session=session)
+
+    async def main():
+        async for event in AsyncListener(pb, reconnect=False):
+            pass
+
+    with pytest.raises(aiohttp.ClientConnectionError):
+        run(main())
+
+
+def test_listener_close():
+    session = FakeStreamSession([], [[FakeMessage('{"type": "tickle", "subtype": "push"}')] * 10])
+    pb = AsyncPushbullet("apikey", session=session)
+
+    async def main():
+        listener = AsyncListener(pb, reconnect=False, max_queue=2)
+        first = await listener.__anext__()
+        await listener.close()
+        return first, [event async for event in listener]
+
+    first, rest = run(main())
+
+    assert first == {"type": "tickle", "subtype": "push"}
+    assert rest == []
+
+
+class UploadSession(FakeSession):
+    """Streams the upload body like aiohttp does when sending it."""
+
+    def __init__(self, responses):
+        super(UploadSession, self).__init__(responses)
+        self.uploaded = b""
+
+    def request(self, method, url, **kwargs):
+        if url != "http://uploadhere.google.com":
+            return super(UploadSession, self).request(method, url, **kwargs)
+        self.calls.append((method, url, kwargs))
+        session = self
+
+        class Writer(object):
+            async def write(self, chunk):
+                session.uploaded += bytes(chunk)
+
+        class Upload(object):
+            async def __aenter__(self):
+                await aiohttp.payload.get_payload(kwargs["data"]).write(Writer())
+                return FakeResponse(204)
+
+            async def __aexit__(self, *exc_info):
+                pass
+
+        return Upload()
+
+
+class NonSeekable(object):
+    def __init__(self, data):
+        self._data = io.BytesIO(data)
+
+    def read(self, size=-1):
+        return self._data.read(size)
+
+
+def test_upload_file_from_pipe():
+    session = UploadSession(
+        [FakeResponse(200, {"data": {}, "file_url": "url", "upload_url": "http://uploadhere.google.com"})]
+    )
+    pb = AsyncPushbullet("apikey", session=session)
+    with open("tests/test.png", "rb") as f:
+        png = f.read()
+
+    result = run(pb.upload_file(NonSeekable(png), "picture"))
+
+    assert result == {"file_type": "image/png", "file_url": "url", "file_name": "picture"}
+    assert png in session.uploaded
+
+
+def test_upload_file_retries_with_progress():
+    session = UploadSession(
+        [
+            FakeResponse(
+                200, {"data": {"key": "value"}, "file_url": "url", "upload_url": "http://uploadhere.google.com"}
+            ),
+        ]
+    )
+    pb = AsyncPushbullet("apikey", session=session, retry=RetryPolicy(max_attempts=2, backoff_base=0))
+    attempts = []
+    request = session.request
+
+    def fail_once(method, url, **kwargs):
+        if url == "http://uploadhere.google.com" and not attempts:
+            # The connection drops after the whole body was read
+            attempts.append(kwargs["data"].read())
+            raise aiohttp.ClientConnectionError("failed")
+        return request(method, url, **kwargs)
+
+    session.request = fail_once
+    progress = []
+
+    with open("tests/test.png", "rb") as f:
+        png = f.read()
+        f.seek(0)
+        run(pb.upload_file(f, "test.png", progress=lambda sent, total: progress.append((sent, total))))
+
+    method, url, kwargs = session.calls[1]
+    assert "Authorization" not in kwargs["headers"]
+    assert int(kwargs["headers"]["Content-Length"]) == progress[-1][1] == len(session.uploaded)
+    assert session.uploaded.count(png) == 1
+    assert progress[-1][0] == progress[-1][1]
+
+
+class ThreadRecordingCache(MemoryCache):
+    def __init__(self):
+        super(ThreadRecordingCache, self).__init__()
+        self.threads = []
+
+    def get(self, key):
+        self.threads.append(threading.current_thread())
+        return super(ThreadRecordingCache, self).get(key)
+
+    def set(self, key, value):
+        self.threads.append(threading.current_thread())
+        super(ThreadRecordingCache, self).set(key, value)
+
+
+def test_upload_file_cache_off_event_loop():
+    session = UploadSession(
+        [FakeResponse(200, {"data": {}, "file_url": "url", "upload_url": "http://uploadhere.google.com"})]
+    )
+    cache = ThreadRecordingCache()
+    pb = AsyncPushbullet("apikey", session=session, upload_cache=cache)
+
+    async def main():
+        with open("tests/test.png", "rb") as f:
+            first = await pb.upload_file(f, "test.png")
+            f.seek(0)
+            return first, await pb.upload_file(f, "test.png")
+
+    first, second = run(main())
+
+    assert first == second
+    assert len(session.calls) == 2
+    assert len(cache.threads) == 3
+    assert threading.current_thread() not in cache.threads
+
+
+def test_upload_file_reads_off_event_loop(monkeypatch):
+    import pushbullet.aio
+
+    session = UploadSession(
+        [FakeResponse(200, {"data": {}, "file_url": "url", "upload_url": "http://uploadhere.google.com"})]
+    )
+    pb = AsyncPushbullet("apikey", session=session)
+    threads = []
+
+    def recording(function):
+        def call(*args):
+            threads.append(threading.current_thread())
+            return function(*args)
+
+        return call
+
+    monkeypatch.setattr(pushbullet.aio, "sniff_file_type", recording(pushbullet.aio.sniff_file_type))
+    monkeypatch.setattr(pushbullet.aio, "MultipartFileStream", recording(pushbullet.aio.MultipartFileStream))
+    with open("tests/test.png", "rb") as f:
+        run(pb.upload_file(NonSeekable(f.read()), "picture"))
+
+    assert len(threads) == 2
+    assert threading.current_thread() not in threads
@@ -0,0 +1,74 @@
+import os
+import stat
+
+from pushbullet.cache import FileCache, MemoryCache
+
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
+
+def test_memory_cache():
+    cache = MemoryCache()
+    cache.set("key", {"file_url": "url"})
+
+    assert cache.get("key") == {"file_url": "url"}
+    assert cache.get("missing") is None
+
+
+def test_memory_cache_drops_least_recently_used():
+    cache = MemoryCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+@patch("pushbullet.cache.time.time")
+def test_memory_cache_ttl(time):
+    time.return_value = 1000
+    cache = MemoryCache(ttl=60)
+    cache.set("key", "value")
+
+    time.return_value = 1059
+    assert cache.get("key") == "value"
+
+    time.return_value = 1060
+    assert cache.get("key") is None
+
+
+def test_file_cache(tmpdir):
+    path = str(tmpdir.join("uploads.json"))
+    FileCache(path).set("key", {"file_url": "url"})
+
+    assert FileCache(path).get("key") == {"file_url": "url"}
+    assert FileCache(path).get("missing") is None
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+@patch("pushbullet.cache.time.time")
+def test_file_cache_ttl(time, tmpdir):
+    path = str(tmpdir.join("uploads.json"))
+    time.return_value = 1000
+    cache = FileCache(path, ttl=60)
+    cache.set("old", "value")
+
+    time.return_value = 1060
+    assert cache.get("old") is None
+
+    cache.set("new", "value")
+    assert list(cache._read()) == ["new"]
+
+
+def test_file_cache_missing_or_broken_file(tmpdir):
+    path = tmpdir.join("uploads.json")
+    assert FileCache(str(path)).get("key") is None
+
+    path.write("not json")
+    assert FileCache(str(path)).get("key") is None
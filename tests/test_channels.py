@@ -75,3 +75,9 @@ class TestChannels(object):
         self.channel._push(data)
         pushed_data = {"title": "test title", "channel_tag": self.channel_tag}
         self.account._push.assert_called_with(pushed_data)
+
+    def test_equality(self):
+        channel_info = {"iden": "123", "tag": self.channel_tag}
+
+        assert channel.Channel(self.account, channel_info) == channel.Channel(self.account, channel_info)
+        assert not hasattr(self.channel, "__dict__")
@@ -42,3 +42,9 @@ class TestChats(object):
             "muted": True,
         }
         self.account._push.assert_called_with(pushed_data)
+
+    def test_equality(self):
+        chat_info = {"iden": "123", "with": {"email": self.contact_email}}
+
+        assert chat.Chat(self.account, chat_info) == chat.Chat(self.account, chat_info)
+        assert not hasattr(self.chat, "__dict__")
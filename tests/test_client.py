@@ -1,3 +1,5 @@
+import json
+
 import pytest
 
 from pushbullet import PushBullet
@@ -8,6 +10,7 @@ except ImportError:
     from mock import patch, Mock
 
 from pushbullet.errors import InvalidKeyError, PushbulletError
+from pushbullet.retry import RetryPolicy
 
 from .helpers import mock_refresh
 
@@ -69,3 +72,84 @@ def test_get_data_other_error():
 
     with pytest.raises(PushbulletError):
         pb._get_data("url")
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_get_data_retried():
+    failed_response = Mock()
+    failed_response.status_code = 503
+    failed_response.headers = {}
+
+    mock_response = Mock()
+    mock_response.status_code = 200
+    mock_response.headers = {}
+    mock_response.json.return_value = {"devices": []}
+
+    session = Mock()
+    session.get.side_effect = [failed_response, mock_response]
+
+    pb = PushBullet("apikey", retry=RetryPolicy(max_attempts=2, backoff_base=0))
+    pb._session = session
+
+    assert pb._get_data("url") == {"devices": []}
+    assert session.get.call_count == 2
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_get_data_retries_exhausted():
+    failed_response = Mock()
+    failed_response.status_code = 503
+    failed_response.headers = {}
+
+    session = Mock()
+    session.get.return_value = failed_response
+
+    pb = PushBullet("apikey", retry=RetryPolicy(max_attempts=3, backoff_base=0))
+    pb._session = session
+
+    with pytest.raises(PushbulletError):
+        pb._get_data("url")
+
+    assert session.get.call_count == 3
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_post_not_retried_on_server_error():
+    failed_response = Mock()
+    failed_response.status_code = 500
+    failed_response.headers = {}
+
+    session = Mock()
+    session.post.return_value = failed_response
+
+    pb = PushBullet("apikey", retry=RetryPolicy(max_attempts=3, backoff_base=0))
+    pb._session = session
+
+    with pytest.raises(PushbulletError):
+        pb.new_chat("name", "test@example.com")
+
+    assert session.post.call_count == 1
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_push_retried_with_guid():
+    failed_response = Mock()
+    failed_response.status_code = 502
+    failed_response.headers = {}
+
+    mock_response = Mock()
+    mock_response.status_code = 200
+    mock_response.headers = {}
+    mock_response.json.return_value = {}
+
+    session = Mock()
+    session.post.side_effect = [failed_response, mock_response]
+
+    pb = PushBullet("apikey", retry=RetryPolicy(max_attempts=2, backoff_base=0))
+    pb._session = session
+
+    pb._push({"type": "note"})
+
+    first, second = session.post.call_args_list
+    assert first == second
+    assert "guid" in json.loads(first[1]["data"])
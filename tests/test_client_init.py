@@ -2,10 +2,13 @@ import sys
 from binascii import a2b_base64
 
 import pytest
-from requests import ConnectionError
+from requests import ConnectionError, Session
+from requests.adapters import HTTPAdapter
 
 from pushbullet import PushBullet
-from pushbullet.errors import NoEncryptionModuleError
+from pushbullet.cache import MemoryCache
+from pushbullet.crypto import derive_key
+from pushbullet.errors import NoEncryptionModuleError, PushbulletError
 
 try:
     from unittest.mock import Mock, patch
@@ -22,8 +25,11 @@ def test_proxy_is_applied(pb_refresh):
 
     with patch("pushbullet.PushBullet.refresh"):
         pb = PushBullet("apikey", proxy=proxy)
+    pb._session = Mock()
 
-    assert pb._session.proxies == proxy
+    pb._request("get", pb.PUSH_URL)
+
+    assert pb._session.get.call_args[1]["proxies"] == proxy
 
 
 @patch.object(PushBullet, "refresh")
@@ -52,6 +58,34 @@ def test_crypto_found():
     assert pb._encryption_key == a2b_base64("ZFKZG50hJs5DrGKWf8fBQ6CSLB1LtTNw+xwwT2ZBl9g=")
 
 
+@patch.object(PushBullet, "refresh")
+@patch("pushbullet.pushbullet.derive_key")
+def test_precomputed_encryption_key(derive_key, pb_refresh):
+    session = Mock()
+
+    pb = PushBullet("apikey", encryption_password="hunter2", encryption_key=b"k" * 32, session=session)
+
+    assert pb._encryption_key == b"k" * 32
+    assert pb.encryption.key == b"k" * 32
+    derive_key.assert_not_called()
+    session.get.assert_not_called()
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_key_cache():
+    key_cache = MemoryCache()
+
+    with patch("pushbullet.crypto.derive_key", wraps=derive_key) as derive:
+        first = PushBullet("apikey", encryption_password="hunter2", key_cache=key_cache)
+        second = PushBullet("apikey", encryption_password="hunter2", key_cache=key_cache)
+        other = PushBullet("apikey", encryption_password="hunter3", key_cache=key_cache)
+
+    assert first._encryption_key == second._encryption_key == a2b_base64("ZFKZG50hJs5DrGKWf8fBQ6CSLB1LtTNw+xwwT2ZBl9g=")
+    assert other._encryption_key != first._encryption_key
+    assert derive.call_count == 2
+    assert len(key_cache) == 2
+
+
 @patch.object(PushBullet, "refresh")
 @patch.object(PushBullet, "_get_data", Mock(return_value=devices_list_response))
 def test_load_devices(pb_refresh):
@@ -80,3 +114,138 @@ def test_load_channels(pb_refresh):
     pb._load_channels()
 
     assert len(pb.channels) == 1
+
+
+@patch.object(PushBullet, "_get_data")
+def test_lazy_init_makes_no_requests(pb_get_data):
+    PushBullet("apikey", lazy=True)
+
+    pb_get_data.assert_not_called()
+
+
+@patch.object(PushBullet, "_get_data", Mock(return_value=devices_list_response))
+def test_lazy_devices_loaded_on_first_access():
+    pb = PushBullet("apikey", lazy=True)
+
+    assert len(pb.devices) == 1
+    assert len(pb.devices) == 1
+
+    PushBullet._get_data.assert_called_once_with(pb.DEVICES_URL, None)
+
+
+def test_parallel_refresh():
+    responses = {
+        PushBullet.DEVICES_URL: devices_list_response,
+        PushBullet.CHATS_URL: chats_list_response,
+        PushBullet.ME_URL: {"iden": "123"},
+        PushBullet.CHANNELS_URL: channels_list_response,
+    }
+    pb = PushBullet("apikey", lazy=True)
+
+    with patch.object(pb, "_get_data", side_effect=lambda url, params=None: responses[url]) as pb_get_data:
+        pb.refresh(parallel=True)
+
+    assert pb_get_data.call_count == 4
+    assert len(pb.devices) == 1
+    assert len(pb.chats) == 1
+    assert len(pb.channels) == 1
+    assert pb.user_info == {"iden": "123"}
+
+
+def test_parallel_refresh_error_keeps_state():
+    pb = PushBullet("apikey", lazy=True)
+    pb.devices = []
+
+    def get_data(url, params=None):
+        if url == PushBullet.CHATS_URL:
+            raise PushbulletError(500)
+        return devices_list_response
+
+    with patch.object(pb, "_get_data", side_effect=get_data):
+        with pytest.raises(PushbulletError):
+            pb.refresh(parallel=True)
+
+    assert pb.devices == []
+
+
+def test_incremental_refresh():
+    pb = PushBullet("apikey", lazy=True)
+    pb.user_info = {"iden": "123"}
+    pb.chats = []
+    pb.channels = []
+
+    with patch.object(pb, "_get_data", return_value=devices_list_response):
+        pb._load_devices()
+
+    assert [d.device_iden for d in pb.devices] == ["1"]
+
+    delta = {
+        "devices": [
+            {"iden": "1", "active": False, "modified": 2000000000.0},
+            {"iden": "3", "active": True, "nickname": "new dev", "modified": 2000000000.0},
+        ]
+    }
+    with patch.object(pb, "_get_data", return_value=delta) as pb_get_data:
+        pb._load_devices(incremental=True)
+
+    pb_get_data.assert_called_once_with(
+        pb.DEVICES_URL, {"modified_after": devices_list_response["devices"][1]["modified"]}
+    )
+    assert [d.device_iden for d in pb.devices] == ["3"]
+    assert pb._watermarks["devices"] == 2000000000.0
+
+
+def test_incremental_refresh_without_previous_load():
+    pb = PushBullet("apikey", lazy=True)
+
+    with patch.object(pb, "_get_data", return_value=channels_list_response) as pb_get_data:
+        pb._load_channels(incremental=True)
+
+    pb_get_data.assert_called_once_with(pb.CHANNELS_URL, None)
+    assert len(pb.channels) == 1
+
+
+def test_pool_size():
+    pb = PushBullet("apikey", lazy=True, pool_connections=4, pool_maxsize=50)
+
+    adapter = pb._session.get_adapter(pb.PUSH_URL)
+    assert adapter._pool_connections == 4
+    assert adapter._pool_maxsize == 50
+
+
+def test_shared_adapter():
+    adapter = HTTPAdapter()
+
+    pb1 = PushBullet("apikey1", lazy=True, adapter=adapter)
+    pb2 = PushBullet("apikey2", lazy=True, adapter=adapter)
+
+    assert pb1._session is not pb2._session
+    assert pb1._session.get_adapter(pb1.PUSH_URL) is adapter
+    assert pb2._session.get_adapter(pb2.PUSH_URL) is adapter
+    assert pb1._auth == ("apikey1", "")
+
+
+def test_injected_session():
+    session = Session()
+    headers = dict(session.headers)
+
+    pb = PushBullet("apikey", lazy=True, session=session, keep_alive=False)
+
+    assert pb._session is session
+    assert session.auth is None
+    assert dict(session.headers) == headers
+    assert pb._headers["Connection"] == "close"
+
+
+def test_shared_session():
+    session = Mock()
+    pb1 = PushBullet("apikey1", lazy=True, session=session)
+    pb2 = PushBullet("apikey2", lazy=True, session=session)
+
+    pb1._request("post", pb1.PUSH_URL, data="{}")
+    pb2._request("post", pb2.PUSH_URL, data="{}")
+
+    first, second = session.post.call_args_list
+    assert first[1]["auth"] == ("apikey1", "")
+    assert second[1]["auth"] == ("apikey2", "")
+    assert first[1]["headers"] == {"Content-Type": "application/json"}
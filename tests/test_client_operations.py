@@ -14,7 +14,7 @@ from pushbullet.chat import Chat
 from pushbullet.device import Device
 from pushbullet.errors import PushbulletError
 
-from .helpers import mock_refresh
+from .helpers import AUTH, HEADERS, mock_refresh
 
 
 @patch.object(PushBullet, "refresh", mock_refresh)
@@ -331,7 +331,7 @@ def test_delete_pushes():
 
     pb.delete_pushes()
 
-    session.delete.assert_called_once_with(pb.PUSH_URL)
+    session.delete.assert_called_once_with(pb.PUSH_URL, auth=AUTH, headers=HEADERS)
 
 
 @patch.object(PushBullet, "refresh", mock_refresh)
@@ -348,7 +348,7 @@ def test_delete_pushes_error():
     with pytest.raises(PushbulletError):
         pb.delete_pushes()
 
-    session.delete.assert_called_once_with(pb.PUSH_URL)
+    session.delete.assert_called_once_with(pb.PUSH_URL, auth=AUTH, headers=HEADERS)
 
 
 @patch.object(PushBullet, "refresh", mock_refresh)
@@ -364,7 +364,7 @@ def test_delete_push():
 
     pb.delete_push("123")
 
-    session.delete.assert_called_once_with(pb.PUSH_URL + "/123")
+    session.delete.assert_called_once_with(pb.PUSH_URL + "/123", auth=AUTH, headers=HEADERS)
 
 
 @patch.object(PushBullet, "refresh", mock_refresh)
@@ -395,7 +395,9 @@ def test_dismiss_push():
 
     pb.dismiss_push("123")
 
-    session.post.assert_called_once_with(pb.PUSH_URL + "/123", data=json.dumps({"dismissed": True}))
+    session.post.assert_called_once_with(
+        pb.PUSH_URL + "/123", data=json.dumps({"dismissed": True}), auth=AUTH, headers=HEADERS
+    )
 
 
 @patch.object(PushBullet, "refresh", mock_refresh)
@@ -411,3 +413,96 @@ def test_dismiss_push_error():
 
     with pytest.raises(PushbulletError):
         pb.dismiss_push("123")
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_get_device_by_iden():
+    pb = PushBullet("apikey")
+
+    pb.devices = [Device(pb, {"iden": "1", "nickname": "device1"}), Device(pb, {"iden": "2", "nickname": "device2"})]
+
+    assert pb.get_device_by_iden("2").nickname == "device2"
+
+    with pytest.raises(PushbulletError):
+        pb.get_device_by_iden("3")
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_get_device_duplicate_nickname():
+    pb = PushBullet("apikey")
+
+    pb.devices = [Device(pb, {"iden": "1", "nickname": "phone"}), Device(pb, {"iden": "2", "nickname": "phone"})]
+
+    assert pb.get_device("phone").device_iden == "1"
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_get_chat():
+    pb = PushBullet("apikey")
+
+    pb.chats = [Chat(pb, {"iden": "1", "with": {"email": "test@example.com"}})]
+
+    assert pb.get_chat("test@example.com").iden == "1"
+
+    with pytest.raises(PushbulletError):
+        pb.get_chat("other@example.com")
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_indexes_follow_changes():
+    mock_response = Mock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {"iden": "1", "nickname": "renamed"}
+
+    session = Mock()
+    session.post.return_value = mock_response
+    session.delete.return_value = mock_response
+
+    pb = PushBullet("apikey")
+    pb._session = session
+
+    pb.devices = [Device(pb, {"iden": "1", "nickname": "device1"})]
+
+    pb.edit_device(pb.devices[0], nickname="renamed")
+
+    assert pb.get_device("renamed").device_iden == "1"
+    with pytest.raises(PushbulletError):
+        pb.get_device("device1")
+
+    pb.remove_device(pb.get_device_by_iden("1"))
+
+    with pytest.raises(PushbulletError):
+        pb.get_device_by_iden("1")
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_indexes_keep_list_order():
+    pb = PushBullet("apikey")
+    first = Device(pb, {"iden": "1", "nickname": "phone"})
+    second = Device(pb, {"iden": "2", "nickname": "tablet"})
+    pb.devices = [first, second]
+
+    renamed = Device(pb, {"iden": "2", "nickname": "phone"})
+    pb._replace_object("devices", second, renamed)
+    added = Device(pb, {"iden": "3", "nickname": "phone"})
+    pb._add_object("devices", added)
+
+    assert pb.get_device("phone") is first
+    pb._remove_object("devices", first)
+    assert pb.get_device("phone") is renamed
+    pb._remove_object("devices", renamed)
+    assert pb.get_device("phone") is added
+    assert pb._indexes["devices"]["nickname"] == {"phone": [added]}
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_reindex_swaps_complete_indexes():
+    pb = PushBullet("apikey")
+    pb.devices = [Device(pb, {"iden": "1", "nickname": "phone"})]
+    before = pb._indexes["devices"]
+
+    pb.devices = [Device(pb, {"iden": "2", "nickname": "tablet"})]
+
+    # A lookup that got hold of the old indexes still finds the old devices
+    assert list(before["iden"]) == ["1"]
+    assert list(pb._indexes["devices"]["iden"]) == ["2"]
@@ -3,15 +3,21 @@ import pytest
 from pushbullet import PushBullet
 
 try:
-    from unittest.mock import Mock, patch
+    from unittest.mock import Mock, call, patch
 except ImportError:
-    from mock import patch, Mock
+    from mock import call, patch, Mock
 
 import json
 
+from pushbullet.cache import MemoryCache
+from pushbullet.channel import Channel
+from pushbullet.chat import Chat
+from pushbullet.device import Device
 from pushbullet.errors import PushbulletError, PushError
+from pushbullet.push import Push
+from pushbullet.upload import MultipartFileStream
 
-from .helpers import mock_refresh
+from .helpers import AUTH, HEADERS, mock_refresh
 
 
 @patch.object(PushBullet, "refresh")
@@ -131,24 +137,20 @@ def test_push_file_no_title_with_body(pb_push, pb_refresh):
 
 
 @patch.object(PushBullet, "refresh")
-@patch("pushbullet.pushbullet.requests")
-def test_upload_file(requests, pb_refresh):
+def test_upload_file(pb_refresh):
     first_response = Mock()
     first_response.status_code = 200
     first_response.json.return_value = {
-        "data": "upload_data",
+        "data": {"awsaccesskeyid": "key"},
         "file_url": "imageurl",
         "upload_url": "http://uploadhere.google.com",
     }
 
     second_response = Mock()
-    second_response.status_code = 200
+    second_response.status_code = 204
 
     session = Mock()
-    session.post.return_value = first_response
-
-    requests.post.return_value = second_response
-    requests.codes.ok = 200
+    session.post.side_effect = [first_response, second_response]
 
     pb = PushBullet("apikey")
     pb._session = session
@@ -162,21 +164,23 @@ def test_upload_file(requests, pb_refresh):
             "file_name": "test.png",
         }
 
-        session.post.assert_called_once_with(
+        assert session.post.call_count == 2
+        assert session.post.call_args_list[0] == call(
             pb.UPLOAD_REQUEST_URL,
             data=json.dumps({"file_name": "test.png", "file_type": "image/png"}),
+            auth=AUTH,
+            headers=HEADERS,
         )
 
-        requests.post.assert_called_once_with(
-            "http://uploadhere.google.com",
-            data="upload_data",
-            files={"file": test_file},
-        )
+        args, kwargs = session.post.call_args_list[1]
+        assert args == ("http://uploadhere.google.com",)
+        assert isinstance(kwargs["data"], MultipartFileStream)
+        assert kwargs["headers"] == {"Content-Type": kwargs["data"].content_type}
+        assert kwargs["auth"] is not None
 
 
 @patch.object(PushBullet, "refresh")
-@patch("pushbullet.pushbullet.requests")
-def test_upload_file_request_fails(requests, pb_refresh):
+def test_upload_file_request_fails(pb_refresh):
     first_response = Mock()
     first_response.status_code = 400
     first_response.json.return_value = {
@@ -185,15 +189,9 @@ def test_upload_file_request_fails(requests, pb_refresh):
         "upload_url": "http://uploadhere.google.com",
     }
 
-    second_response = Mock()
-    second_response.status_code = 200
-
     session = Mock()
     session.post.return_value = first_response
 
-    requests.post.return_value = second_response
-    requests.codes.ok = 200
-
     pb = PushBullet("apikey")
     pb._session = session
 
@@ -202,7 +200,32 @@ def test_upload_file_request_fails(requests, pb_refresh):
         with pytest.raises(PushbulletError):
             pb.upload_file(test_file, "test.png", "image/png")
 
-    requests.post.assert_not_called()
+    session.post.assert_called_once()
+
+
+@patch.object(PushBullet, "refresh")
+def test_upload_file_upload_fails(pb_refresh):
+    first_response = Mock()
+    first_response.status_code = 200
+    first_response.json.return_value = {
+        "data": {},
+        "file_url": "imageurl",
+        "upload_url": "http://uploadhere.google.com",
+    }
+
+    second_response = Mock()
+    second_response.status_code = 403
+
+    session = Mock()
+    session.post.side_effect = [first_response, second_response]
+
+    pb = PushBullet("apikey")
+    pb._session = session
+
+    with open("tests/test.png", "rb") as test_file:
+
+        with pytest.raises(PushbulletError):
+            pb.upload_file(test_file, "test.png", "image/png")
 
 
 @patch.object(PushBullet, "refresh", mock_refresh)
@@ -234,6 +257,8 @@ def test_push_sms_encrypted_ok(pb_encrypt):
                 "push": {"ciphertext": "encrypted text", "encrypted": True},
             }
         ),
+        auth=AUTH,
+        headers=HEADERS,
     )
 
 
@@ -269,6 +294,8 @@ def test_push_sms_plaintext_failure():
                 },
             }
         ),
+        auth=AUTH,
+        headers=HEADERS,
     )
 
 
@@ -287,10 +314,7 @@ def test__push_ok():
 
     server_response = pb._push({"key": "value"})
 
-    session.post.assert_called_once_with(
-        pb.PUSH_URL,
-        data=json.dumps({"key": "value"}),
-    )
+    session.post.assert_called_once_with(pb.PUSH_URL, data=json.dumps({"key": "value"}), auth=AUTH, headers=HEADERS)
 
     assert server_response == {
         "rate_limit": {
@@ -315,10 +339,7 @@ def test__push_fail():
     with pytest.raises(PushError):
         pb._push({"key": "value"})
 
-    session.post.assert_called_once_with(
-        pb.PUSH_URL,
-        data=json.dumps({"key": "value"}),
-    )
+    session.post.assert_called_once_with(pb.PUSH_URL, data=json.dumps({"key": "value"}), auth=AUTH, headers=HEADERS)
 
 
 @patch.object(PushBullet, "refresh", mock_refresh)
@@ -352,7 +373,9 @@ def test_get_pushes_no_cursor():
     pushes = pb.get_pushes(filter_inactive=False)
 
     assert len(pushes) == 0
-    session.get.assert_called_once_with(pb.PUSH_URL, params={"modified_after": None, "limit": None})
+    session.get.assert_called_once_with(
+        pb.PUSH_URL, params={"modified_after": None, "limit": None}, auth=AUTH, headers=HEADERS
+    )
 
 
 @patch.object(PushBullet, "refresh", mock_refresh)
@@ -376,3 +399,148 @@ def test_get_pushes_with_cursor():
     assert len(pushes) == 3
 
     assert session.get.call_count == 2
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_iter_pushes_limit():
+    response1 = Mock()
+    response1.status_code = 200
+    response1.json.return_value = {"pushes": ["push1", "push2"], "cursor": "cursor1"}
+
+    response2 = Mock()
+    response2.status_code = 200
+    response2.json.return_value = {"pushes": ["push3", "push4"], "cursor": "cursor2"}
+
+    session = Mock()
+    session.get.side_effect = [response1, response2]
+
+    pb = PushBullet("apikey")
+    pb._session = session
+
+    pushes = pb.iter_pushes(limit=3, page_size=2)
+
+    assert list(pushes) == ["push1", "push2", "push3"]
+    assert (pushes.cursor, pushes.offset) == ("cursor1", 1)
+    assert response1.json.call_count == 1
+    session.get.assert_called_with(
+        pb.PUSH_URL,
+        params={"modified_after": None, "limit": 2, "active": "true", "cursor": "cursor1"},
+        auth=AUTH,
+        headers=HEADERS,
+    )
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_push_many():
+    pb = PushBullet("apikey")
+    device = Device(pb, {"iden": "123"})
+    chat = Chat(pb, {"iden": "456", "with": {"email": "chat@example.com"}})
+    channel = Channel(pb, {"tag": "tag1"})
+
+    def push(data):
+        if data.get("email") == "fail@example.com":
+            raise PushError("failed")
+        return {"sent_to": data}
+
+    with patch.object(pb, "_push", side_effect=push):
+        results = pb.push_many(
+            {"type": "note", "title": "title", "body": "body"},
+            [device, chat, channel, "fail@example.com", "test@example.com"],
+            concurrency=2,
+        )
+
+    assert [target for target, _, _ in results] == [device, chat, channel, "fail@example.com", "test@example.com"]
+    assert results[0][1]["sent_to"]["device_iden"] == "123"
+    assert results[1][1]["sent_to"]["email"] == "chat@example.com"
+    assert results[2][1]["sent_to"]["channel_tag"] == "tag1"
+    assert results[3][1] is None
+    assert isinstance(results[3][2], PushError)
+    assert results[4][1]["sent_to"] == {"type": "note", "title": "title", "body": "body", "email": "test@example.com"}
+    assert results[4][2] is None
+
+
+@patch.object(PushBullet, "refresh")
+def test_upload_file_cached(pb_refresh):
+    first_response = Mock()
+    first_response.status_code = 200
+    first_response.json.return_value = {
+        "data": {},
+        "file_url": "imageurl",
+        "upload_url": "http://uploadhere.google.com",
+    }
+
+    second_response = Mock()
+    second_response.status_code = 204
+
+    session = Mock()
+    session.post.side_effect = [first_response, second_response]
+
+    pb = PushBullet("apikey", upload_cache=MemoryCache())
+    pb._session = session
+
+    with open("tests/test.png", "rb") as test_file:
+        first = pb.upload_file(test_file, "test.png")
+    with open("tests/test.png", "rb") as test_file:
+        second = pb.upload_file(test_file, "test.png")
+
+    assert first == second == {"file_type": "image/png", "file_url": "imageurl", "file_name": "test.png"}
+    assert session.post.call_count == 2
+
+
+@patch.object(PushBullet, "refresh")
+def test_upload_file_cache_is_keyed_by_name(pb_refresh):
+    pb = PushBullet("apikey", upload_cache=MemoryCache())
+
+    with open("tests/test.png", "rb") as test_file:
+        first = pb._upload_cache_key(test_file, "test.png", "image/png")
+        assert test_file.tell() == 0
+        second = pb._upload_cache_key(test_file, "other.png", "image/png")
+
+    assert first is not None
+    assert first != second
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_upload_files():
+    pb = PushBullet("apikey")
+
+    def upload(f, file_name, file_type=None):
+        if file_name == "fail.png":
+            raise PushbulletError("failed")
+        return {"file_type": file_type, "file_url": "url/" + file_name, "file_name": file_name}
+
+    with patch.object(pb, "upload_file", side_effect=upload):
+        results = pb.upload_files(
+            [("f1", "one.png"), ("f2", "fail.png"), ("f3", "three.txt", "text/plain")], concurrency=2
+        )
+
+    assert [file for file, _, _ in results] == [
+        ("f1", "one.png"),
+        ("f2", "fail.png"),
+        ("f3", "three.txt", "text/plain"),
+    ]
+    assert results[0][1]["file_url"] == "url/one.png"
+    assert results[0][2] is None
+    assert results[1][1] is None
+    assert isinstance(results[1][2], PushbulletError)
+    assert results[2][1] == {"file_type": "text/plain", "file_url": "url/three.txt", "file_name": "three.txt"}
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_get_pushes_as_objects():
+    response1 = Mock()
+    response1.status_code = 200
+    response1.json.return_value = {"pushes": [{"iden": "push1", "target_device_iden": "1"}]}
+
+    session = Mock()
+    session.get.side_effect = [response1]
+
+    pb = PushBullet("apikey")
+    pb._session = session
+    pb.devices = [Device(pb, {"iden": "1", "nickname": "device1"})]
+
+    pushes = pb.get_pushes(as_objects=True)
+
+    assert isinstance(pushes[0], Push)
+    assert pushes[0].iden == "push1"
+    assert pushes[0].target_device.nickname == "device1"
@@ -0,0 +1,52 @@
+import json
+from binascii import a2b_base64
+
+import pytest
+
+from pushbullet.crypto import EncryptionEngine, derive_key
+from pushbullet.errors import DecryptionError
+
+KEY = a2b_base64("1sW28zp7CWv5TtGjlQpDHHG4Cbr9v36fG5o4f74LsKg=")
+
+
+def test_derive_key():
+    assert derive_key("hunter2", "123") == a2b_base64("ZFKZG50hJs5DrGKWf8fBQ6CSLB1LtTNw+xwwT2ZBl9g=")
+
+
+def test_decrypt():
+    engine = EncryptionEngine(KEY)
+
+    assert engine.decrypt("MSfJxxY5YdjttlfUkCaKA57qU9SuCN8+ZhYg/xieI+lDnQ==") == "meow!"
+
+
+def test_encrypt_decrypt():
+    engine = EncryptionEngine(KEY)
+    message = json.dumps({"cat": "meow!", "dog": "wööf"})
+
+    encrypted = engine.encrypt(message)
+
+    assert encrypted != engine.encrypt(message)
+    assert a2b_base64(encrypted)[:1] == b"1"
+    assert engine.decrypt(encrypted) == message
+
+
+def test_encrypt_decrypt_many():
+    engine = EncryptionEngine(KEY)
+    messages = ["one", "two", ""]
+
+    assert engine.decrypt_many(engine.encrypt_many(messages)) == messages
+
+
+def test_decrypt_invalid_version():
+    engine = EncryptionEngine(KEY)
+    encrypted = engine.encrypt("meow!")
+
+    with pytest.raises(DecryptionError):
+        engine.decrypt("2" + encrypted[1:])
+
+
+def test_decrypt_wrong_key():
+    encrypted = EncryptionEngine(KEY).encrypt("meow!")
+
+    with pytest.raises(DecryptionError):
+        EncryptionEngine(b"k" * 32).decrypt(encrypted)
@@ -85,3 +85,29 @@ class TestDevices(object):
         new_device = device.Device(self.account, self.device_info)
 
         assert new_device.icon == "system"
+
+    def test_no_icon_does_not_change_input(self):
+        device_info = {"iden": "123"}
+
+        new_device = device.Device(self.account, device_info)
+
+        assert new_device.icon == "system"
+        assert device_info == {"iden": "123"}
+
+    def test_equality(self):
+        same = device.Device(self.account, {"iden": self.device_iden})
+        other = device.Device(self.account, {"iden": "other"})
+
+        assert self.device == same
+        assert hash(self.device) == hash(same)
+        assert self.device != other
+
+    def test_equality_without_iden(self):
+        first = device.Device(self.account, {})
+        second = device.Device(self.account, {})
+
+        assert first == first
+        assert first != second
+
+    def test_slots(self):
+        assert not hasattr(self.device, "__dict__")
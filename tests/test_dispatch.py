@@ -0,0 +1,127 @@
+import threading
+
+import pytest
+
+from pushbullet.dispatch import Dispatcher, device_key
+
+
+def test_dispatch_in_order_per_key():
+    handled = []
+    lock = threading.Lock()
+
+    def handler(event):
+        with lock:
+            handled.append(event)
+
+    dispatcher = Dispatcher(handler, workers=3, key=lambda event: event["device"])
+    for i in range(50):
+        for device in ("a", "b", "c"):
+            dispatcher.dispatch({"device": device, "i": i})
+    dispatcher.close()
+
+    assert len(handled) == 150
+    for device in ("a", "b", "c"):
+        assert [event["i"] for event in handled if event["device"] == device] == list(range(50))
+
+
+def test_dispatch_without_key_uses_all_workers():
+    threads = set()
+
+    def handler(event):
+        threads.add(threading.current_thread())
+
+    dispatcher = Dispatcher(handler, workers=2)
+    dispatcher.dispatch({})
+    dispatcher.dispatch({})
+    dispatcher.close()
+
+    assert len(threads) == 2
+
+
+def _blocked_dispatcher(overflow, handled):
+    release = threading.Event()
+    started = threading.Event()
+
+    def handler(event):
+        if event == "first":
+            started.set()
+            release.wait()
+        handled.append(event)
+
+    dispatcher = Dispatcher(handler, workers=1, max_queue=2, overflow=overflow)
+    dispatcher.dispatch("first")
+    started.wait()
+    return dispatcher, release
+
+
+def test_drop_newest():
+    handled = []
+    dispatcher, release = _blocked_dispatcher("drop_newest", handled)
+    for event in ("a", "b", "c", "d"):
+        dispatcher.dispatch(event)
+    release.set()
+    dispatcher.close()
+
+    assert handled == ["first", "a", "b"]
+    assert dispatcher.dropped == 2
+
+
+def test_drop_oldest():
+    handled = []
+    dispatcher, release = _blocked_dispatcher("drop_oldest", handled)
+    for event in ("a", "b", "c", "d"):
+        dispatcher.dispatch(event)
+    release.set()
+    dispatcher.close()
+
+    assert handled == ["first", "c", "d"]
+    assert dispatcher.dropped == 2
+
+
+def test_handler_errors():
+    errors = []
+
+    def handler(event):
+        raise ValueError(event)
+
+    dispatcher = Dispatcher(handler, workers=1, on_error=errors.append)
+    dispatcher.dispatch("event")
+    dispatcher.close()
+
+    assert isinstance(errors[0], ValueError)
+
+
+def test_unknown_overflow():
+    with pytest.raises(ValueError):
+        Dispatcher(lambda event: None, overflow="ignore")
+
+
+def test_close_with_full_queue():
+    release = threading.Event()
+    handled = []
+
+    def handler(event):
+        release.wait(5)
+        handled.append(event)
+
+    # The worker holds the first event, the other two fill its queue
+    dispatcher = Dispatcher(handler, workers=1, max_queue=2)
+    dispatcher.dispatch(1)
+    dispatcher.dispatch(2)
+    dispatcher.dispatch(3)
+
+    closer = threading.Thread(target=dispatcher.close, kwargs={"wait": False})
+    closer.start()
+    closer.join(1)
+    assert not closer.is_alive()
+
+    dispatcher.dispatch(4)
+    release.set()
+    dispatcher._threads[0].join(1)
+
+    assert handled == [1, 2, 3]
+
+
+def test_device_key():
+    assert device_key({"type": "push", "push": {"source_device_iden": "123"}}) == "123"
+    assert device_key({"type": "tickle", "subtype": "push"}) is None
@@ -1,23 +1,74 @@
 from __future__ import print_function
 
-import mimetypes
+import io
+
+try:
+    from unittest.mock import Mock, patch
+except ImportError:
+    from mock import Mock, patch
 
 from pushbullet import filetype
 
+with open("tests/test.png", "rb") as _pic:
+    PNG = _pic.read()
+
+
+class NonSeekable(object):
+    def __init__(self, data):
+        self._data = io.BytesIO(data)
+
+    def read(self, size=-1):
+        return self._data.read(size)
+
 
 class TestFiletypes(object):
     def test_magic(self):
 
         filename = "tests/test.png"
         with open(filename, "rb") as pic:
-            output = filetype.get_file_type(pic, filename)
+            output = filetype.get_file_type(pic, "picture")
             assert output == ("image/png")
+            assert pic.tell() == 0
 
+    @patch.object(filetype, "_magic_from_buffer", False)
     def test_mimetypes(self):
-        del filetype.magic_from_buffer
-        filetype.mimetypes = mimetypes
-
         filename = "tests/test.png"
         with open(filename, "rb") as pic:
             output = filetype.get_file_type(pic, filename)
             assert output == "image/png"
+
+    @patch.object(filetype, "_magic_from_buffer", False)
+    def test_unknown_without_magic(self):
+        assert filetype.get_file_type(io.BytesIO(PNG), "picture") is None
+
+    def test_extension_skips_magic(self):
+        magic = Mock()
+        with patch.object(filetype, "_magic_from_buffer", magic):
+            output = filetype.get_file_type(io.BytesIO(b"not a png"), "picture.png")
+
+        assert output == "image/png"
+        magic.assert_not_called()
+
+    def test_sniffed_types_are_cached(self, tmpdir):
+        path = tmpdir.join("picture")
+        path.write(PNG, "wb")
+        magic = Mock(return_value="image/png")
+
+        with patch.object(filetype, "_magic_from_buffer", magic):
+            for _ in range(2):
+                with open(str(path), "rb") as pic:
+                    assert filetype.get_file_type(pic, "picture") == "image/png"
+
+        magic.assert_called_once()
+
+    def test_non_seekable_stream(self):
+        file_type, stream = filetype.sniff_file_type(NonSeekable(PNG), "picture")
+
+        assert file_type == "image/png"
+        assert stream.read(10) + stream.read() == PNG
+
+    def test_iterator(self):
+        file_type, stream = filetype.sniff_file_type(iter([PNG[:100], PNG[100:]]), "picture")
+
+        assert file_type == "image/png"
+        assert stream.read(1000) + stream.read() == PNG
@@ -1,9 +1,15 @@
+import threading
+
+import websocket
+
 from pushbullet import Listener, PushBullet
+from pushbullet.errors import PushbulletError
+from pushbullet.listener import CLOCK_SKEW, sync_events
 
 try:
-    from unittest.mock import patch
+    from unittest.mock import Mock, patch
 except ImportError:
-    from mock import patch
+    from mock import Mock, patch
 
 from .helpers import mock_refresh
 
@@ -15,3 +21,255 @@ def test_listener_init():
     listener = Listener(pb)
 
     listener.close()
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_listener_without_reconnect_runs_once():
+    listener = Listener(PushBullet("apikey"))
+
+    with patch.object(websocket.WebSocketApp, "run_forever") as run_forever:
+        listener.run_forever()
+
+    run_forever.assert_called_once()
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_listener_reconnects_and_catches_up():
+    pb = PushBullet("apikey")
+    pb.get_pushes = Mock(return_value=[{"iden": "new", "modified": 3}, {"iden": "old", "modified": 2}])
+    pushes = []
+    listener = Listener(pb, on_push=pushes.append, reconnect=True, reconnect_delay=0)
+    connections = []
+
+    def run_forever(*args, **kwargs):
+        listener._on_open()(listener)
+        listener._on_message()(listener, '{"type": "tickle", "subtype": "push"}')
+        connections.append(listener.last_update)
+        listener._on_close()(listener, None, None)
+        if len(connections) == 2:
+            listener.close()
+
+    with patch.object(websocket.WebSocketApp, "run_forever", side_effect=run_forever):
+        listener.run_forever()
+
+    assert len(connections) == 2
+    pb.get_pushes.assert_called_once_with(modified_after=connections[0] - CLOCK_SKEW, filter_inactive=False)
+    assert [push.get("push", {}).get("iden") for push in pushes] == [None, "old", "new", None]
+    assert pushes[1] == {"type": "sync", "subtype": "push", "push": {"iden": "old", "modified": 2}}
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_listener_catches_up_after_newest_push_fetched():
+    pb = PushBullet("apikey")
+    pb.get_pushes = Mock(return_value=[])
+    listener = Listener(pb, reconnect=True)
+    listener.connected = True
+    listener.last_update = 100.0
+    listener.watermark = 90.0
+    listener._on_close()(listener, None, None)
+
+    listener._on_open()(listener)
+
+    pb.get_pushes.assert_called_once_with(modified_after=90.0, filter_inactive=False)
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+@patch("pushbullet.listener.exponential_backoff", return_value=0)
+def test_listener_backs_off_until_connected(backoff):
+    listener = Listener(PushBullet("apikey"), reconnect=True, reconnect_delay=2, reconnect_max_delay=10)
+    attempts = []
+
+    def run_forever(*args, **kwargs):
+        attempts.append(args)
+        if len(attempts) == 3:
+            listener.close()
+
+    with patch.object(websocket.WebSocketApp, "run_forever", side_effect=run_forever):
+        listener.run_forever()
+
+    assert len(attempts) == 3
+    assert [c[0] for c in backoff.call_args_list] == [(1, 2, 10), (2, 2, 10), (3, 2, 10)]
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_listener_reports_catch_up_errors():
+    pb = PushBullet("apikey")
+    pb.get_pushes = Mock(side_effect=PushbulletError("failed"))
+    errors = []
+    listener = Listener(pb, on_error=errors.append, reconnect=True)
+    listener.connected = True
+    listener._on_close()(listener, None, None)
+
+    listener._on_open()(listener)
+
+    assert isinstance(errors[0], PushbulletError)
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_listener_workers():
+    handled = []
+    done = threading.Event()
+
+    def on_push(event):
+        handled.append((event, threading.current_thread()))
+        done.set()
+
+    listener = Listener(PushBullet("apikey"), on_push=on_push, workers=2)
+    listener._on_message()(listener, '{"type": "tickle", "subtype": "push"}')
+    done.wait(1)
+    listener.close()
+
+    assert handled[0][0] == {"type": "tickle", "subtype": "push"}
+    assert handled[0][1] is not threading.current_thread()
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_listener_coalesces_push_tickles():
+    pb = PushBullet("apikey")
+    pb.get_pushes = Mock(return_value=[{"iden": "new", "modified": 20.5}, {"iden": "old", "modified": 20.0}])
+    events = []
+    done = threading.Event()
+
+    def on_push(event):
+        events.append(event)
+        if len(events) == 2:
+            done.set()
+
+    listener = Listener(pb, on_push=on_push, coalesce=0.05)
+    listener._on_open()(listener)
+    listener.watermark = 10.0
+    for _ in range(50):
+        listener._on_message()(listener, '{"type": "tickle", "subtype": "push"}')
+    done.wait(1)
+    listener.close()
+
+    pb.get_pushes.assert_called_once_with(modified_after=10.0, filter_inactive=False)
+    assert [event["push"]["iden"] for event in events] == ["old", "new"]
+    assert events[0]["type"] == "sync"
+    assert listener.watermark == 20.5
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_listener_seeds_watermark_from_server():
+    pb = PushBullet("apikey")
+    pb.get_pushes = Mock(return_value=[{"iden": "newest", "modified": 5.0}])
+    listener = Listener(pb, coalesce=0.05)
+
+    with patch.object(websocket.WebSocketApp, "run_forever"):
+        listener.run_forever()
+
+    pb.get_pushes.assert_called_once_with(limit=1, filter_inactive=False)
+    assert listener.watermark == 5.0
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_listener_coalesces_device_tickles():
+    pb = PushBullet("apikey")
+    pb._load_devices = Mock()
+    events = []
+    done = threading.Event()
+
+    def on_push(event):
+        events.append(event)
+        if len(events) == 2:
+            done.set()
+
+    listener = Listener(pb, on_push=on_push, coalesce=0.05)
+    listener._on_message()(listener, '{"type": "tickle", "subtype": "device"}')
+    listener._on_message()(listener, '{"type": "tickle", "subtype": "device"}')
+    listener._on_message()(listener, '{"type": "push", "push": {"type": "mirror"}}')
+    done.wait(1)
+    listener.close()
+
+    pb._load_devices.assert_called_once_with(incremental=True)
+    assert events == [{"type": "push", "push": {"type": "mirror"}}, {"type": "tickle", "subtype": "device"}]
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_listener_metrics():
+    listener = Listener(PushBullet("apikey"))
+    assert listener.connection_age is None
+
+    listener._on_open()(listener)
+    listener.last_update -= 10
+
+    assert 0 <= listener.connection_age < 1
+    assert 10 <= listener.idle_time < 11
+
+    listener._on_message()(listener, '{"type": "nop"}')
+    assert listener.idle_time < 1
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_listener_watchdog_drops_idle_connection():
+    listener = Listener(PushBullet("apikey"), watchdog=0.01)
+    dropped = threading.Event()
+
+    with patch.object(websocket.WebSocketApp, "close", side_effect=lambda *args, **kwargs: dropped.set()):
+        listener._on_open()(listener)
+        listener.last_update -= 60
+        listener._start_watchdog()
+        dropped.wait(1)
+        # Only the connection was dropped, the listener keeps going
+        assert not listener._closed.is_set()
+        listener._stop_watchdog()
+
+    assert dropped.is_set()
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_listener_watchdog_reconnects():
+    assert Listener(PushBullet("apikey"), watchdog=1).reconnect
+    assert not Listener(PushBullet("apikey")).reconnect
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_listener_watchdog_stops_with_run_forever():
+    listener = Listener(PushBullet("apikey"), reconnect=False, watchdog=1)
+    watchdogs = []
+
+    def run_forever(*args, **kwargs):
+        watchdogs.append(listener._watchdog_thread)
+
+    with patch.object(websocket.WebSocketApp, "run_forever", side_effect=run_forever):
+        listener.run_forever()
+        listener.run_forever()
+
+    assert listener._watchdog_thread is None
+    assert watchdogs[0] is not watchdogs[1]
+    for watchdog in watchdogs:
+        watchdog.join(1)
+        assert not watchdog.is_alive()
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_listener_delivers_one_event_at_a_time():
+    pb = PushBullet("apikey")
+    pb._load_devices = Mock()
+    running = []
+    overlapped = []
+    done = threading.Event()
+
+    def on_push(event):
+        running.append(event)
+        overlapped.append(len(running) > 1)
+        threading.Event().wait(0.05)
+        running.remove(event)
+        if event["type"] == "tickle":
+            done.set()
+
+    listener = Listener(pb, on_push=on_push, coalesce=0.01)
+    listener._on_message()(listener, '{"type": "tickle", "subtype": "device"}')
+    listener._on_message()(listener, '{"type": "push", "push": {"type": "mirror"}}')
+    done.wait(1)
+    listener.close()
+
+    assert overlapped == [False, False]
+
+
+def test_sync_events():
+    events, watermark = sync_events([{"iden": "new", "modified": 3}, {"iden": "old", "modified": 2}], 1)
+
+    assert [event["push"]["iden"] for event in events] == ["old", "new"]
+    assert watermark == 3
+    assert sync_events([], 5) == ([], 5)
@@ -0,0 +1,70 @@
+try:
+    from unittest.mock import Mock
+except ImportError:
+    from mock import Mock
+
+from pushbullet.pagination import PageIterator
+
+
+def test_follows_cursor():
+    account = Mock()
+    account._get_data.side_effect = [
+        {"devices": [{"iden": "1"}, {"iden": "2"}], "cursor": "cursor1"},
+        {"devices": [{"iden": "3"}]},
+    ]
+
+    pages = PageIterator(account, "url", "devices", page_size=2)
+
+    assert [item["iden"] for item in pages] == ["1", "2", "3"]
+    assert (pages.cursor, pages.offset) == ("cursor1", 1)
+    assert account._get_data.call_count == 2
+    account._get_data.assert_called_with("url", {"limit": 2, "cursor": "cursor1"})
+
+
+def test_pages_are_fetched_on_demand():
+    account = Mock()
+    account._get_data.side_effect = [
+        {"devices": [{"iden": "1"}], "cursor": "cursor1"},
+        {"devices": [{"iden": "2"}]},
+    ]
+
+    pages = PageIterator(account, "url", "devices", {"modified_after": 1.0})
+
+    assert next(pages) == {"iden": "1"}
+    assert (pages.cursor, pages.offset) == (None, 1)
+    account._get_data.assert_called_once_with("url", {"modified_after": 1.0})
+
+
+def test_limit():
+    account = Mock()
+    account._get_data.return_value = {"pushes": [{"iden": "1"}, {"iden": "2"}], "cursor": "cursor1"}
+
+    pages = PageIterator(account, "url", "pushes", limit=1)
+
+    assert list(pages) == [{"iden": "1"}]
+    account._get_data.assert_called_once_with("url", None)
+
+
+def test_resume_from_cursor():
+    account = Mock()
+    account._get_data.return_value = {"pushes": []}
+
+    assert list(PageIterator(account, "url", "pushes", cursor="cursor1")) == []
+    account._get_data.assert_called_once_with("url", {"cursor": "cursor1"})
+
+
+def test_resume_mid_page():
+    account = Mock()
+    account._get_data.side_effect = [
+        {"pushes": [{"iden": "1"}, {"iden": "2"}, {"iden": "3"}], "cursor": "cursor1"},
+        {"pushes": [{"iden": "1"}, {"iden": "2"}, {"iden": "3"}], "cursor": "cursor1"},
+        {"pushes": [{"iden": "4"}]},
+    ]
+
+    pages = PageIterator(account, "url", "pushes")
+    assert [next(pages), next(pages)] == [{"iden": "1"}, {"iden": "2"}]
+
+    resumed = PageIterator(account, "url", "pushes", cursor=pages.cursor, offset=pages.offset)
+    assert list(resumed) == [{"iden": "3"}, {"iden": "4"}]
+    assert account._get_data.call_args_list[1][0] == ("url", None)
+    assert (resumed.cursor, resumed.offset) == ("cursor1", 1)
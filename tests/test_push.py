@@ -0,0 +1,76 @@
+try:
+    from unittest.mock import Mock
+except ImportError:
+    from mock import Mock
+
+from pushbullet.errors import PushbulletError
+from pushbullet.push import Push
+
+
+class TestPush(object):
+    def setup_class(self):
+        self.push_info = {
+            "iden": "push1",
+            "type": "note",
+            "active": True,
+            "dismissed": False,
+            "created": 1000.0,
+            "modified": 1001.0,
+            "direction": "incoming",
+            "title": "test title",
+            "body": "test body",
+            "target_device_iden": "dev1",
+            "sender_email": "sender@example.com",
+        }
+        self.device = Mock()
+        self.chat = Mock()
+        self.account = Mock()
+        self.account.get_device_by_iden.return_value = self.device
+        self.account.get_chat.return_value = self.chat
+        self.push = Push(self.account, self.push_info)
+
+    def test_fields(self):
+        assert self.push.iden == "push1"
+        assert self.push.title == "test title"
+        assert self.push.modified == 1001.0
+        assert self.push.dismissed is False
+        assert self.push.url is None
+        assert self.push["body"] == "test body"
+        assert self.push.get("missing", "default") == "default"
+
+    def test_target_device(self):
+        assert self.push.target_device is self.device
+        self.account.get_device_by_iden.assert_called_with("dev1")
+
+    def test_chat(self):
+        assert self.push.chat is self.chat
+        self.account.get_chat.assert_called_with("sender@example.com")
+
+    def test_unknown_source_device(self):
+        account = Mock()
+        account.get_device_by_iden.side_effect = PushbulletError("not found")
+
+        push = Push(account, {"source_device_iden": "gone"})
+
+        assert push.source_device is None
+        assert push.target_device is None
+
+    def test_comparison(self):
+        same = Push(self.account, dict(self.push_info))
+        newer = Push(self.account, dict(self.push_info, modified=2000.0))
+
+        assert self.push == same
+        assert hash(self.push) == hash(same)
+        assert self.push != newer
+        assert self.push < newer
+        assert sorted([newer, self.push]) == [self.push, newer]
+
+    def test_comparison_same_modified(self):
+        other = Push(self.account, dict(self.push_info, iden="other"))
+
+        assert self.push != other
+        assert (self.push < other) != (other < self.push)
+        assert not self.push < Push(self.account, dict(self.push_info))
+
+    def test_slots(self):
+        assert not hasattr(self.push, "__dict__")
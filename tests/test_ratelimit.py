@@ -0,0 +1,93 @@
+try:
+    from unittest.mock import Mock, patch
+except ImportError:
+    from mock import patch, Mock
+
+from pushbullet import PushBullet
+from pushbullet.ratelimit import RateLimiter
+
+from .helpers import mock_refresh
+
+
+@patch("pushbullet.ratelimit.time")
+def test_no_budget_reported(time):
+    time.time.return_value = 1000.0
+    limiter = RateLimiter()
+
+    limiter.update({})
+
+    assert limiter.delay() == 0
+    assert limiter.status == {"limit": None, "remaining": None, "reset": None}
+
+
+@patch("pushbullet.ratelimit.time")
+def test_burst_then_pace(time):
+    time.time.return_value = 1000.0
+    limiter = RateLimiter(burst=2)
+
+    limiter.update({"X-Ratelimit-Limit": "100", "X-Ratelimit-Remaining": "10", "X-Ratelimit-Reset": "1100"})
+
+    assert limiter.delay() == 0
+    assert limiter.delay() == 0
+    # 8 requests left for the remaining 100 seconds
+    assert limiter.delay() == 12.5
+
+
+@patch("pushbullet.ratelimit.time")
+def test_budget_exhausted(time):
+    time.time.return_value = 1000.0
+    limiter = RateLimiter()
+
+    limiter.update({"X-Ratelimit-Remaining": "0", "X-Ratelimit-Reset": "1030"})
+
+    assert limiter.delay() == 30
+
+    time.time.return_value = 1031.0
+    assert limiter.delay() == 0
+
+
+@patch("pushbullet.ratelimit.time")
+def test_acquire_sleeps(time):
+    time.time.return_value = 1000.0
+    limiter = RateLimiter()
+    limiter.update({"X-Ratelimit-Remaining": "0", "X-Ratelimit-Reset": "1030"})
+
+    limiter.acquire()
+
+    time.sleep.assert_called_once_with(30)
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_client_tracks_budget():
+    mock_response = Mock()
+    mock_response.status_code = 200
+    mock_response.headers = {"X-Ratelimit-Limit": "16384", "X-Ratelimit-Remaining": "1000", "X-Ratelimit-Reset": "1"}
+    mock_response.json.return_value = {}
+
+    session = Mock()
+    session.get.return_value = mock_response
+
+    pb = PushBullet("apikey")
+    pb._session = session
+
+    pb._get_data("url")
+
+    assert pb.rate_limiter.status == {"limit": 16384, "remaining": 1000, "reset": 1}
+
+
+@patch.object(PushBullet, "refresh", mock_refresh)
+def test_unpaced_requests_skip_rate_limiter():
+    mock_response = Mock()
+    mock_response.status_code = 204
+    mock_response.headers = {"X-Ratelimit-Remaining": "0"}
+
+    session = Mock()
+    session.post.return_value = mock_response
+
+    pb = PushBullet("apikey", rate_limiter=Mock())
+    pb._session = session
+
+    pb._request("post", "https://upload.example.com", paced=False)
+
+    assert pb.rate_limiter.acquire.call_count == 0
+    assert pb.rate_limiter.update.call_count == 0
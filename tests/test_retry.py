@@ -0,0 +1,51 @@
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
+from pushbullet.retry import RetryPolicy, exponential_backoff
+
+
+def test_exponential_backoff():
+    assert exponential_backoff(1, base=0.5, jitter=False) == 0.5
+    assert exponential_backoff(3, base=0.5, jitter=False) == 2
+    assert exponential_backoff(10, base=0.5, maximum=30, jitter=False) == 30
+    assert 0 <= exponential_backoff(3, base=0.5) <= 2
+
+
+def test_should_retry():
+    policy = RetryPolicy(max_attempts=3)
+
+    assert policy.should_retry(1, 503)
+    assert policy.should_retry(1, None)
+    assert not policy.should_retry(1, 400)
+    assert not policy.should_retry(3, 503)
+
+
+def test_should_retry_not_idempotent():
+    policy = RetryPolicy(max_attempts=3)
+
+    assert policy.should_retry(1, 429, idempotent=False)
+    assert not policy.should_retry(1, 503, idempotent=False)
+    assert not policy.should_retry(1, None, idempotent=False)
+
+
+def test_delay_retry_after():
+    policy = RetryPolicy(backoff_max=30)
+
+    assert policy.delay(1, {"Retry-After": "5"}) == 5
+    assert policy.delay(1, {"Retry-After": "500"}) == 30
+
+
+@patch("pushbullet.retry.time")
+def test_delay_ratelimit_reset(time):
+    time.time.return_value = 1000.0
+    policy = RetryPolicy()
+
+    assert policy.delay(1, {"X-Ratelimit-Remaining": "0", "X-Ratelimit-Reset": "1010"}) == 10
+
+
+def test_delay_backoff():
+    policy = RetryPolicy(backoff_base=1, jitter=False)
+
+    assert policy.delay(2, {}) == 2
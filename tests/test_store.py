@@ -0,0 +1,78 @@
+try:
+    from unittest.mock import Mock
+except ImportError:
+    from mock import Mock
+
+from pushbullet.device import Device
+from pushbullet.push import Push
+from pushbullet.store import PushStore
+
+
+def make_push(iden, modified, **fields):
+    push = {"iden": iden, "active": True, "type": "note", "dismissed": False, "created": modified, "modified": modified}
+    push.update(fields)
+    return push
+
+
+class TestPushStore(object):
+    def setup_method(self):
+        self.account = Mock()
+        self.account.iter_pushes.return_value = [
+            make_push("3", 3000.0, target_device_iden="dev1"),
+            make_push("2", 2000.0, type="link", dismissed=True),
+            make_push("1", 1000.0, target_device_iden="dev1"),
+        ]
+        self.store = PushStore(self.account, ":memory:")
+        self.store.sync()
+
+    def teardown_method(self):
+        self.store.close()
+
+    def test_initial_sync(self):
+        self.account.iter_pushes.assert_called_once_with(modified_after=None, filter_inactive=False, page_size=None)
+        assert len(self.store) == 3
+        assert self.store.watermark == 3000.0
+
+    def test_delta_sync(self):
+        self.account.iter_pushes.return_value = [
+            {"iden": "2", "active": False, "modified": 4000.0},
+            make_push("1", 3500.0, dismissed=True, created=1000.0),
+            make_push("4", 3600.0),
+        ]
+
+        assert self.store.sync() == 3
+
+        self.account.iter_pushes.assert_called_with(modified_after=3000.0, filter_inactive=False, page_size=None)
+        assert self.store.get("2") is None
+        assert self.store.get("1")["dismissed"] is True
+        assert [push["iden"] for push in self.store.query()] == ["4", "3", "1"]
+        assert self.store.watermark == 4000.0
+
+    def test_failed_sync_is_rolled_back(self):
+        def pushes():
+            yield make_push("4", 4000.0)
+            raise IOError("connection lost")
+
+        self.account.iter_pushes.return_value = pushes()
+
+        try:
+            self.store.sync()
+        except IOError:
+            pass
+
+        assert self.store.get("4") is None
+        assert self.store.watermark == 3000.0
+
+    def test_query(self):
+        device = Device(self.account, {"iden": "dev1"})
+
+        assert [push["iden"] for push in self.store.query(device=device)] == ["3", "1"]
+        assert [push["iden"] for push in self.store.query(type="link")] == ["2"]
+        assert [push["iden"] for push in self.store.query(dismissed=False, limit=1)] == ["3"]
+        assert [push["iden"] for push in self.store.query(since=1000.0, until=3000.0)] == ["2", "1"]
+
+    def test_query_as_objects(self):
+        pushes = self.store.query(device="dev1", as_objects=True)
+
+        assert all(isinstance(push, Push) for push in pushes)
+        assert pushes[0].iden == "3"
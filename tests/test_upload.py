@@ -0,0 +1,113 @@
+import io
+import os
+
+import pytest
+
+from pushbullet.upload import MultipartFileStream
+
+
+def _parts(stream):
+    body = stream.read()
+    return body.split(("--" + stream.boundary).encode("UTF-8"))
+
+
+def test_body_contains_fields_and_file():
+    f = io.BytesIO(b"file contents")
+    stream = MultipartFileStream({"acl": "public-read"}, f, "test.txt", "text/plain")
+
+    parts = _parts(stream)
+
+    assert b'name="acl"\r\n\r\npublic-read\r\n' in parts[1]
+    assert b'name="file"; filename="test.txt"\r\nContent-Type: text/plain\r\n\r\nfile contents\r\n' in parts[2]
+    assert parts[3] == b"--\r\n"
+
+
+def test_len_matches_body():
+    with open("tests/test.png", "rb") as f:
+        stream = MultipartFileStream({"key": "value"}, f, "test.png", "image/png")
+
+        assert len(stream) == len(stream.read())
+        assert len(stream) > os.path.getsize("tests/test.png")
+
+
+def test_file_is_read_from_current_position():
+    f = io.BytesIO(b"skipped|sent")
+    f.seek(8)
+    stream = MultipartFileStream({}, f, "test.txt", "text/plain")
+
+    assert b"\r\n\r\nsent\r\n" in stream.read()
+
+
+def test_iterates_in_chunks():
+    f = io.BytesIO(b"x" * 1000)
+    stream = MultipartFileStream({}, f, "test.txt", "text/plain")
+    stream.chunk_size = 100
+
+    chunks = list(stream)
+
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert sum(len(chunk) for chunk in chunks) == len(stream)
+
+
+def test_rewind():
+    f = io.BytesIO(b"file contents")
+    stream = MultipartFileStream({}, f, "test.txt", "text/plain")
+
+    first = stream.read()
+    stream.seek(0)
+
+    assert stream.tell() == 0
+    assert stream.read() == first
+
+
+def test_only_rewinding_is_supported():
+    stream = MultipartFileStream({}, io.BytesIO(b"file contents"), "test.txt", "text/plain")
+
+    with pytest.raises(io.UnsupportedOperation):
+        stream.seek(10)
+
+
+def test_progress():
+    calls = []
+    stream = MultipartFileStream(
+        {}, io.BytesIO(b"x" * 1000), "test.txt", "text/plain", lambda *args: calls.append(args)
+    )
+    stream.chunk_size = 100
+
+    list(stream)
+
+    assert [sent for sent, _ in calls] == sorted(sent for sent, _ in calls)
+    assert calls[-1] == (len(stream), len(stream))
+
+
+class NonSeekable(object):
+    def __init__(self, data):
+        self._data = io.BytesIO(data)
+
+    def read(self, size=-1):
+        return self._data.read(size)
+
+
+def test_non_seekable_file():
+    stream = MultipartFileStream({}, NonSeekable(b"file contents"), "test.txt", "text/plain")
+
+    body = stream.read()
+
+    assert len(stream) == len(body)
+    assert b"\r\n\r\nfile contents\r\n" in body
+
+
+def test_file_growing_after_construction():
+    f = io.BytesIO(b"file contents")
+    stream = MultipartFileStream({}, f, "test.log", "text/plain")
+    f.seek(0, io.SEEK_END)
+    f.write(b" and more")
+    stream.seek(0)
+
+    body = stream.read()
+
+    assert len(stream) == len(body)
+    assert b"\r\n\r\nfile contents\r\n" in body
+
+    stream.seek(0)
+    assert b"".join(stream) == body